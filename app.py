@@ -1,5 +1,16 @@
 from auth_gui import AuthWindow
 from gui import TaskManagerGUI
+from sessions import load_local_session
+
+session = load_local_session()
+if session:
+    # Returning user: trust the signed local token now, re-verify it in the background
+    TaskManagerGUI(
+        session["email"],
+        session_token=session["token"],
+        verify_session=True
+    ).mainloop()
+    raise SystemExit
 
 auth = AuthWindow()
 auth.mainloop()
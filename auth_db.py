@@ -1,48 +1,115 @@
 import hashlib
-import oracledb
+import secrets
+from datetime import datetime, timedelta
+
+import config
+from metrics import timed
+from migrations import migrate
+from pool import get_pool
 
 class AuthDB:
-    def __init__(self):
-        self.conn = oracledb.connect(
-            user="system",
-            password="system",
-            dsn="localhost:1522/XE"
-        )
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
+        self.backend = self.pool.backend
+        migrate(self.pool)
 
     def hash_password(self, password):
         return hashlib.sha256(password.encode()).hexdigest()
 
+    @timed("AuthDB.register")
     def register(self, email, password):
         password_hash = self.hash_password(password)
-        cursor = self.conn.cursor()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute(
+                    """
+                    INSERT INTO users1122 (email, password_hash)
+                    VALUES (:1, :2)
+                    """,
+                    (email, password_hash)
+                )
+                conn.commit()
+                return True
+            except self.backend.IntegrityError:
+                conn.rollback()
+                return False
+            finally:
+                cursor.close()
+
+    @timed("AuthDB.login")
+    def login(self, email, password):
+        password_hash = self.hash_password(password)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
 
-        try:
             cursor.execute(
                 """
-                INSERT INTO users1122 (email, password_hash)
-                VALUES (:1, :2)
+                SELECT id FROM users1122
+                WHERE email = :1 AND password_hash = :2
                 """,
                 (email, password_hash)
             )
-            self.conn.commit()
-            return True
-        except oracledb.IntegrityError:
-            return False
-        finally:
-            cursor.close()
 
-    def login(self, email, password):
-        password_hash = self.hash_password(password)
-        cursor = self.conn.cursor()
-
-        cursor.execute(
-            """
-            SELECT id FROM users1122
-            WHERE email = :1 AND password_hash = :2
-            """,
-            (email, password_hash)
-        )
-
-        user = cursor.fetchone()
-        cursor.close()
+            user = cursor.fetchone()
+            cursor.close()
         return user is not None
+
+    # ================= SESSIONS =================
+    # Only a hash of each token is stored, so a leaked table cannot be replayed.
+
+    @timed("AuthDB.create_session")
+    def create_session(self, email, days=None):
+        """
+        Starts a persistent session; returns (token, expires_at).
+        Also drops this user's expired sessions.
+        """
+        token = secrets.token_urlsafe(32)
+        now = datetime.now().replace(microsecond=0)
+        expires_at = now + timedelta(days=days or config.SESSION_DAYS)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM sessions WHERE email = :1 AND expires_at < :2",
+                (email, now)
+            )
+            cursor.execute(
+                """
+                INSERT INTO sessions (token_hash, email, created_at, expires_at)
+                VALUES (:1, :2, :3, :4)
+                """,
+                (self.hash_password(token), email, now, expires_at)
+            )
+            conn.commit()
+            cursor.close()
+        return token, expires_at
+
+    @timed("AuthDB.validate_session")
+    def validate_session(self, token):
+        """
+        Returns the session's email, or None if it is unknown, revoked or expired.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT email FROM sessions
+                WHERE token_hash = :1 AND expires_at > :2
+                """,
+                (self.hash_password(token), datetime.now())
+            )
+            row = cursor.fetchone()
+            cursor.close()
+        return row[0] if row else None
+
+    @timed("AuthDB.revoke_session")
+    def revoke_session(self, token):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM sessions WHERE token_hash = :1",
+                (self.hash_password(token),)
+            )
+            conn.commit()
+            cursor.close()
@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import messagebox
-from auth_db import AuthDB
+import config
+from client import open_auth_db
 from gui import TaskManagerGUI
+from sessions import save_local_session
 
 # ---------- THEME ----------
 BG = "#0f172a"
@@ -20,7 +22,7 @@ class AuthWindow(tk.Tk):
         self.configure(bg=BG)
         self.resizable(False, False)
 
-        self.db = AuthDB()
+        self.db = open_auth_db()
         self.container = None
 
         self.show_register()
@@ -112,6 +114,7 @@ class AuthWindow(tk.Tk):
         self.login_email = tk.StringVar()
         self.login_pass = tk.StringVar()
         self.show_pass = tk.BooleanVar()
+        self.remember = tk.BooleanVar(value=True)
 
         self.entry(card, "Email", self.login_email)
         self.pass_entry = self.entry(card, "Password", self.login_pass, show="*")
@@ -124,6 +127,13 @@ class AuthWindow(tk.Tk):
             activebackground=CARD
         ).pack(anchor="w", padx=30)
 
+        tk.Checkbutton(
+            card, text="Keep me signed in",
+            variable=self.remember,
+            bg=CARD, fg=MUTED, selectcolor=CARD,
+            activebackground=CARD
+        ).pack(anchor="w", padx=30)
+
         tk.Button(
             card, text="Login",
             bg=ACCENT, fg="white",
@@ -140,8 +150,15 @@ class AuthWindow(tk.Tk):
         email = self.login_email.get().strip()
         password = self.login_pass.get().strip()
         if self.db.login(email, password):
+            token = None
+            # A thin client needs a session for every request to the service
+            if self.remember.get() or config.SERVICE_URL:
+                token, expires_at = self.db.create_session(email)
+            if self.remember.get():
+                # Next launch opens the dashboard without this round trip
+                save_local_session(email, token, expires_at)
             self.destroy()
-            TaskManagerGUI(user_email=email).mainloop()
+            TaskManagerGUI(user_email=email, session_token=token).mainloop()
         else:
             messagebox.showerror("Login Failed", "Invalid email or password")
 
@@ -0,0 +1,6 @@
+"""
+Benchmarks for TaskDB, TaskStore and the task table.
+
+    python -m bench --rows 1000 10000 100000 --output results.json
+    python -m bench.compare before.json after.json
+"""
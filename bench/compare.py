@@ -0,0 +1,42 @@
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return {(r["scale"], r["name"]): r for r in json.load(f)["results"]}
+
+
+def main(argv=None):
+    """
+    python -m bench.compare before.json after.json
+    Prints the median of each benchmark in both runs and the speedup, and
+    the bytes per task of each memory measurement.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(main.__doc__.strip(), file=sys.stderr)
+        return 2
+    before, after = load(argv[0]), load(argv[1])
+
+    print(f"{'scale':>8}  {'benchmark':<36} {'before ms':>11} {'after ms':>11} {'speedup':>8}")
+    keys = sorted(before.keys() & after.keys())
+    for key in keys:
+        if "median" not in before[key] or "median" not in after[key]:
+            continue
+        b, a = before[key]["median"], after[key]["median"]
+        speedup = f"{b / a:7.2f}x" if a else "      -"
+        print(f"{key[0]:>8}  {key[1]:<36} {b * 1000:11.2f} {a * 1000:11.2f} {speedup}")
+
+    memory = [k for k in keys if "bytes_per_task" in before[k] and "bytes_per_task" in after[k]]
+    if memory:
+        print(f"\n{'scale':>8}  {'memory':<36} {'before B/t':>11} {'after B/t':>11} {'ratio':>8}")
+    for key in memory:
+        b, a = before[key]["bytes_per_task"], after[key]["bytes_per_task"]
+        ratio = f"{a / b:7.2f}x" if b else "      -"
+        print(f"{key[0]:>8}  {key[1]:<36} {b:11.0f} {a:11.0f} {ratio}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
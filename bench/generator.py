@@ -0,0 +1,70 @@
+import random
+from datetime import date, timedelta
+
+CATEGORIES = ["General", "Work", "Personal", "Others", "Shopping", "Health",
+              "Finance", "Travel", "Learning", "Home"]
+PRIORITIES = ["High", "Medium", "Low"]
+STATUSES = ["Pending", "Completed"]
+
+WORDS = ("review update call email report plan fix deploy write read check "
+         "order pay book clean prepare send draft meeting budget design test "
+         "invoice client server backup release groceries doctor flight").split()
+
+
+def zipf_weights(n, s=1.2):
+    """
+    Weights 1/k^s: the first category is by far the most common.
+    """
+    return [1 / (k ** s) for k in range(1, n + 1)]
+
+
+class TaskGenerator:
+    """
+    Deterministic synthetic tasks (same seed, same tasks) in the lowercase
+    shape TaskDB.add_task/add_tasks expect.
+
+    Categories follow a Zipf-like skew; long_fraction of the tasks get a
+    multi-kilobyte description to exercise LOB handling.
+    """
+
+    def __init__(self, seed=42, categories=None, skew=1.2,
+                 long_fraction=0.05, long_size=4000):
+        self.random = random.Random(seed)
+        self.categories = categories or CATEGORIES
+        self.weights = zipf_weights(len(self.categories), skew)
+        self.long_fraction = long_fraction
+        self.long_size = long_size
+        self.today = date(2025, 1, 1)
+
+    def title(self):
+        return " ".join(self.random.choices(WORDS, k=self.random.randint(2, 6))).capitalize()
+
+    def description(self):
+        if self.random.random() < self.long_fraction:
+            size = self.random.randint(self.long_size // 2, self.long_size * 2)
+        else:
+            size = self.random.randint(0, 200)
+        text = " ".join(self.random.choices(WORDS, k=size // 6 + 1))
+        return text[:size]
+
+    def task(self):
+        r = self.random
+        due = ""
+        if r.random() < 0.7:
+            due = (self.today + timedelta(days=r.randint(-60, 365))).isoformat()
+        return {
+            "title": self.title(),
+            "description": self.description(),
+            "due_date": due or None,
+            "priority": r.choices(PRIORITIES, weights=[2, 5, 3])[0],
+            "category": r.choices(self.categories, weights=self.weights)[0],
+            "status": r.choices(STATUSES, weights=[7, 3])[0],
+        }
+
+    def tasks(self, n):
+        for _ in range(n):
+            yield self.task()
+
+
+def generate_users(n, domain="bench.example.com"):
+    return [f"user{i}@{domain}" for i in range(n)]
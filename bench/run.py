@@ -0,0 +1,339 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import config
+from bench.generator import TaskGenerator, generate_users
+from db import TaskDB
+from pool import ConnectionPool
+from storage import SQLiteBackend
+from task_store import SortOrder, TaskStore
+from task_table import TaskTable, VirtualTaskTable
+
+SEARCHES = ["re", "rev", "review", "budget design", "zzz"]
+
+
+# ================= TIMING =================
+
+def measure(fn, repeat=5, ops=1):
+    """
+    Runs fn repeat times; returns timing stats in seconds (per run and per op).
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {
+        "runs": repeat,
+        "ops": ops,
+        "min": min(times),
+        "median": median,
+        "mean": statistics.fmean(times),
+        "max": max(times),
+        "per_op": median / ops,
+        "ops_per_sec": ops / median if median else None,
+    }
+
+
+def measure_memory(fn):
+    """
+    Runs fn once; returns (bytes still allocated afterwards, fn's result),
+    i.e. the memory held by what fn built.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return size, result
+
+
+def fetch_task_dicts(db, user_email):
+    """
+    get_tasks as it was before Task: the same query, one 9-key dict per row
+    with every value its own object. The baseline for get_tasks' memory row,
+    built from its own fetch so neither side shares the other's strings.
+    """
+    with db.pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+        SELECT {db.list_columns}
+        FROM tasks
+        WHERE user_email = :user_email
+        ORDER BY priority_rank DESC, id DESC
+        """, {"user_email": user_email})
+        rows = cur.fetchall()
+    tasks = []
+    for r in rows:
+        task = {
+            "ID": r[0],
+            "TITLE": r[1],
+            "DESCRIPTION": r[2],
+            "DUE_DATE": r[3].strftime("%Y-%m-%d") if r[3] else "",
+            "PRIORITY": r[4],
+            "CATEGORY": r[5],
+            "STATUS": r[6],
+            "RECURRENCE": r[7],
+            "NEXT_DUE": r[8].strftime("%Y-%m-%d") if r[8] else "",
+        }
+        if task["DESCRIPTION"] and len(task["DESCRIPTION"]) > config.DESCRIPTION_PREFIX:
+            task["DESCRIPTION"] = task["DESCRIPTION"][:config.DESCRIPTION_PREFIX]
+            task["DESCRIPTION_TRUNCATED"] = True
+        tasks.append(task)
+    return tasks
+
+
+# ================= HEADLESS TABLE =================
+
+class HeadlessTree:
+    """
+    Stand-in for ttk.Treeview with the calls TaskTable/VirtualTaskTable make,
+    so table population can be timed without a display.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.order = []
+        self._next = 0
+        self._selection = ()
+
+    def insert(self, parent, index, iid=None, values=()):
+        if iid is None:
+            self._next += 1
+            iid = f"I{self._next}"
+        self.items[iid] = values
+        if index == "end":
+            self.order.append(iid)
+        else:
+            self.order.insert(index, iid)
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.items[iid]
+        gone = set(iids)
+        self.order = [i for i in self.order if i not in gone]
+
+    def detach(self, *iids):
+        gone = set(iids)
+        self.order = [i for i in self.order if i not in gone]
+
+    def move(self, iid, parent, index):
+        if iid in self.order:
+            self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def get_children(self, item=""):
+        return tuple(self.order)
+
+    def item(self, iid, **kw):
+        if "values" in kw:
+            self.items[iid] = kw["values"]
+            return None
+        return {"values": self.items[iid]}
+
+    def selection(self):
+        return self._selection
+
+    def selection_set(self, *iids):
+        self._selection = iids
+
+    def selection_remove(self, *iids):
+        self._selection = ()
+
+    def focus(self, iid=None):
+        return self._selection[0] if self._selection else ""
+
+    def configure(self, **kw):
+        pass
+
+    def bind(self, *args):
+        pass
+
+    def yview_moveto(self, fraction):
+        pass
+
+
+class _Scrollbar:
+    def configure(self, **kw):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+def _row_values(t):
+    return (t["ID"], t["TITLE"], t["DESCRIPTION"], t["DUE_DATE"],
+            t["PRIORITY"], t["CATEGORY"], t["STATUS"])
+
+
+# ================= SUITE =================
+
+def run_scale(rows, args, workdir):
+    """
+    Benchmarks one data size against a fresh embedded SQLite database.
+    """
+    results = []
+
+    def record(name, stats, **extra):
+        results.append(dict(scale=rows, name=name, **stats, **extra))
+        print(f"  {name:<36} median {stats['median'] * 1000:10.2f} ms", file=sys.stderr)
+
+    def record_memory(name, size, count):
+        results.append(dict(scale=rows, name=name, bytes=size, bytes_per_task=size / count))
+        print(f"  {name:<36} {size / count:10.0f} bytes/task", file=sys.stderr)
+
+    path = os.path.join(workdir, f"bench_{rows}.db")
+    db = TaskDB(ConnectionPool(SQLiteBackend(path), min_size=1, max_size=2))
+    gen = TaskGenerator(seed=args.seed, skew=args.skew,
+                        long_fraction=args.long_fraction, long_size=args.long_size)
+    user, *others = generate_users(1 + args.other_users)
+
+    # ---------- LOAD ----------
+    start = time.perf_counter()
+    for other in others:
+        db.add_tasks(list(gen.tasks(int(rows * args.other_ratio))), other)
+    inserted = 0
+    while inserted < rows:
+        batch = list(gen.tasks(min(args.chunk_size, rows - inserted)))
+        inserted += db.add_tasks(batch, user)
+    elapsed = time.perf_counter() - start
+    record("add_tasks (bulk load)", {
+        "runs": 1, "ops": inserted, "min": elapsed, "median": elapsed,
+        "mean": elapsed, "max": elapsed, "per_op": elapsed / inserted,
+        "ops_per_sec": inserted / elapsed,
+    })
+
+    # ---------- TaskDB ----------
+    record("get_tasks", measure(lambda: db.get_tasks(user), args.repeat))
+    record("get_tasks_page (first)", measure(
+        lambda: db.get_tasks_page(user, args.page_size), args.repeat * 4))
+    record("iter_tasks (all pages)", measure(
+        lambda: sum(1 for _ in db.iter_tasks(user, args.page_size)), args.repeat))
+    record("get_counts", measure(lambda: db.get_counts(user), args.repeat * 4))
+    for q in SEARCHES:
+        record(f"TaskDB.search {q!r}", measure(lambda: db.search(user, q), args.repeat * 4),
+               matches=len(db.search(user, q)))
+
+    rnd = random.Random(args.seed)
+    new_ids = []
+    record("add_task", measure(
+        lambda: new_ids.append(db.add_task(gen.task(), user)["ID"]), args.ops, 1))
+    tasks = db.get_tasks(user)
+    ids = [t["ID"] for t in tasks]
+    record("update_task", measure(
+        lambda: db.update_task(rnd.choice(ids), gen.task(), user), args.ops, 1))
+    record("delete_task", measure(
+        lambda: db.delete_task(new_ids.pop(), user), min(args.ops, len(new_ids)), 1))
+    picked = rnd.sample(ids, min(args.bulk_size, len(ids)))
+    record(f"update_tasks ({len(picked)} ids)", measure(
+        lambda: db.update_tasks(picked, {"priority": "High"}, user), args.repeat, len(picked)))
+    # The same single-row updates, group-committed
+    ops = [{"op": "update", "id": rnd.choice(ids), "task": gen.task()} for _ in range(args.ops)]
+    record(f"write_batch ({len(ops)} updates)", measure(
+        lambda: db.write_batch(ops, user), args.repeat, len(ops)))
+    bulk_ids = [db.add_task(gen.task(), user)["ID"] for _ in range(args.bulk_size)]
+    record(f"delete_tasks ({len(bulk_ids)} ids)", measure(
+        lambda: db.delete_tasks(bulk_ids, user), 1, len(bulk_ids)))
+
+    # ---------- MEMORY ----------
+    # Each side from its own fetch, titles and descriptions included
+    size, tasks = measure_memory(lambda: db.get_tasks(user))
+    record_memory("memory: get_tasks (Task)", size, len(tasks))
+    size, _ = measure_memory(lambda: fetch_task_dicts(db, user))
+    record_memory("memory: get_tasks (dicts)", size, len(tasks))
+    # On top of the tasks, which the store only references
+    size, _ = measure_memory(lambda: TaskStore(tasks))
+    record_memory("memory: TaskStore indexes", size, len(tasks))
+
+    # ---------- TaskStore ----------
+    record("TaskStore.load", measure(lambda: TaskStore(tasks), args.repeat))
+    store = TaskStore(tasks)
+    categories = sorted(c for c in store.by_category if c)
+    record("category filter (all)", measure(
+        lambda: [store.query(category=c) for c in categories], args.repeat, len(categories)))
+    order = SortOrder()
+    order.columns = [("Due", False), ("Title", True)]
+    record("column sort (first, keys built)", measure(lambda: order.sort(tasks), 1))
+    record("column sort (cached keys)", measure(lambda: order.sort(tasks), args.repeat))
+
+    # ---------- TABLE ----------
+    record("table populate (plain)", measure(
+        lambda: TaskTable(HeadlessTree(), _row_values).set_rows(tasks), args.repeat))
+    plain = TaskTable(HeadlessTree(), _row_values)
+    plain.set_rows(tasks)
+    record("table refresh (plain, unchanged)", measure(
+        lambda: plain.set_rows(tasks), args.repeat))
+    record("table populate (virtual)", measure(
+        lambda: VirtualTaskTable(HeadlessTree(), _row_values, _Scrollbar(), 25).set_rows(tasks),
+        args.repeat * 4))
+    table = VirtualTaskTable(HeadlessTree(), _row_values, _Scrollbar(), 25)
+    table.set_rows(tasks)
+    record("table scroll (virtual, 100 pages)", measure(
+        lambda: [table.yview("scroll", 1, "pages") for _ in range(100)], args.repeat, 100))
+
+    db.pool.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Task Manager benchmarks")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000],
+                        help="tasks for the benchmarked user, one run per value")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skew", type=float, default=1.2, help="Zipf exponent for categories")
+    parser.add_argument("--long-fraction", type=float, default=0.05,
+                        help="share of tasks with a long description")
+    parser.add_argument("--long-size", type=int, default=4000, help="typical long description size")
+    parser.add_argument("--other-users", type=int, default=4)
+    parser.add_argument("--other-ratio", type=float, default=0.1,
+                        help="tasks per other user, as a fraction of --rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ops", type=int, default=100, help="single-row writes timed")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--bulk-size", type=int, default=1000, help="ids per bulk update/delete")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workdir", help="keep the generated databases here")
+    parser.add_argument("--output", help="write results as JSON (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "args": vars(args),
+        },
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for rows in args.rows:
+            print(f"{rows} rows", file=sys.stderr)
+            report["results"].extend(run_scale(rows, args, workdir))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
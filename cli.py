@@ -0,0 +1,320 @@
+"""
+Headless task operations for scripts and scheduled jobs; never imports tkinter.
+
+    python cli.py list --status Pending
+    python cli.py list --due-before 2026-11-30
+    python cli.py add --title "Pay rent" --due-date 2026-11-01 --recurrence Monthly
+    python cli.py update 42 --priority High
+    python cli.py complete 42 43
+    python cli.py search "quarterly report"
+    python cli.py stats
+    python cli.py batch < changes.jsonl
+
+Output is JSON Lines on stdout: one task (or result) per line. The account
+comes from --token (or TASKMANAGER_TOKEN), from --user with
+TASKMANAGER_PASSWORD (prompted for when unset), or from the session saved by
+"Keep me signed in"; all are checked with AuthDB.
+
+batch reads one operation per line, e.g. {"op": "add", "title": "x"},
+{"op": "update", "id": 42, "status": "Completed"}, {"op": "complete", "id": 42}
+or {"op": "delete", "id": 42}. Consecutive adds are inserted together with
+one executemany per chunk and reported as {"op": "add", "count": n}.
+"""
+import argparse
+import getpass
+import json
+import os
+import sys
+import time
+
+from auth_db import AuthDB
+from db import TaskDB, task_input
+from sessions import load_local_session
+from task_store import TaskCounts
+from transfer import FIELDS, chunked
+from recurrence import expand
+from utils import PRIORITY_RANK, RECURRENCE_OPTIONS, STATUS_OPTIONS, date_to_str, str_to_date
+
+OPS = ("add", "update", "complete", "delete")
+
+
+class CLIError(Exception):
+    pass
+
+
+# ================= ACCOUNT =================
+
+def authenticate(args, auth):
+    """
+    The email of the account the command runs as.
+    """
+    token = args.token or os.environ.get("TASKMANAGER_TOKEN")
+    if token:
+        email = auth.validate_session(token)
+        if email is None:
+            raise CLIError("session token is unknown or expired")
+        return email
+
+    if args.user:
+        password = os.environ.get("TASKMANAGER_PASSWORD")
+        if password is None:
+            password = getpass.getpass(f"Password for {args.user}: ")
+        if not auth.login(args.user, password):
+            raise CLIError("invalid email or password")
+        return args.user
+
+    session = load_local_session()
+    if session is None or auth.validate_session(session["token"]) != session["email"]:
+        raise CLIError("not signed in; pass --token or --user")
+    return session["email"]
+
+
+# ================= RECORDS =================
+
+def to_record(t):
+    """
+    A TaskDB task dict as printed: lowercase keys, empty dates as null.
+    """
+    return {k.lower(): (None if v == "" and k in ("DUE_DATE", "NEXT_DUE") else v)
+            for k, v in t.items()}
+
+
+def emit(record, out=None):
+    (out or sys.stdout).write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def merged(db, task_id, changes, user_email):
+    """
+    The stored task with changes applied, in TaskDB's write shape, or None
+    if there is no such task. next_due is left for TaskDB to work out.
+    """
+    current = db.get_task(task_id, user_email)
+    if current is None:
+        return None
+    task = task_input(current)
+    task.pop("next_due")
+    task.update(changes)
+    return task
+
+
+# ================= COMMANDS =================
+
+def cmd_list(db, user_email, args):
+    if args.due_before:
+        until = str_to_date(args.due_before)
+        # One line per occurrence in the window, a repeating task's included
+        due = expand(db.get_due(user_email, until), str_to_date(args.due_after), until)
+        rows = ((t, date_to_str(when)) for when, t in due)
+    else:
+        rows = ((t, None) for t in db.iter_tasks(user_email, full=True))
+    descriptions = {}
+    for t, occurrence in rows:
+        if args.category and t["CATEGORY"] != args.category:
+            continue
+        if args.status and t["STATUS"] != args.status:
+            continue
+        record = to_record(t)
+        if record.pop("description_truncated", False):
+            # get_due lists description prefixes; fetch the few that were cut
+            if t["ID"] not in descriptions:
+                descriptions[t["ID"]] = db.get_description(t["ID"], user_email)
+            record["description"] = descriptions[t["ID"]]
+        if occurrence is not None:
+            record["occurrence"] = occurrence
+        emit(record)
+
+
+def cmd_add(db, user_email, args):
+    emit(to_record(db.add_task(_changes(args), user_email)))
+
+
+def cmd_update(db, user_email, args):
+    task = merged(db, args.id, _changes(args), user_email)
+    updated = task and db.update_task(args.id, task, user_email)
+    if not updated:
+        raise CLIError(f"no task {args.id}")
+    emit(to_record(updated))
+
+
+def cmd_complete(db, user_email, args):
+    # One transaction for all the ids
+    done = db.update_tasks(args.ids, {"status": "Completed"}, user_email)
+    for t in done:
+        emit(to_record(t))
+    _check_found(args.ids, [t["ID"] for t in done])
+
+
+def cmd_delete(db, user_email, args):
+    deleted = db.delete_tasks(args.ids, user_email)
+    for task_id in deleted:
+        emit({"id": task_id, "deleted": True})
+    _check_found(args.ids, deleted)
+
+
+def _check_found(requested, found):
+    missing = [i for i in requested if i not in set(found)]
+    if missing:
+        raise CLIError(f"no task {', '.join(map(str, missing))}")
+
+
+def cmd_search(db, user_email, args):
+    for t in db.search(user_email, args.text, args.limit):
+        emit(to_record(t))
+
+
+def cmd_stats(db, user_email, args):
+    counts = TaskCounts(db.get_counts(user_email))
+    emit({
+        "total": counts.total(),
+        "by_status": {s: counts.status_count(s) for s in STATUS_OPTIONS},
+        "by_category": counts.category_counts(),
+    })
+
+
+def cmd_batch(db, user_email, args):
+    """
+    Applies the operations read from stdin in order. A bad line, or one the
+    database rejects, is reported and skipped; the rest still run.
+    """
+    start = time.perf_counter()
+    done = failed = 0
+    # (line number, task) per add not inserted yet
+    adds = []
+
+    def flush_adds():
+        nonlocal done, failed
+        for chunk in chunked(adds, args.chunk_size):
+            try:
+                emit({"op": "add", "count": db.add_tasks([task for _, task in chunk], user_email)})
+                done += len(chunk)
+            except db.backend.DatabaseError as e:
+                # One transaction per chunk: none of its adds went in
+                emit({"line": chunk[0][0], "last_line": chunk[-1][0], "error": str(e)})
+                failed += len(chunk)
+        adds.clear()
+
+    for n, line in enumerate(sys.stdin, start=1):
+        if not line.strip():
+            continue
+        try:
+            change = json.loads(line)
+            if not isinstance(change, dict):
+                raise CLIError("expected a JSON object")
+            op = change.pop("op", None)
+            if op not in OPS:
+                raise CLIError(f"op must be one of {', '.join(OPS)}")
+            task = {k: v for k, v in change.items() if k in FIELDS}
+            if op == "add":
+                if not task.get("title"):
+                    raise CLIError("title is required")
+                # Checked now: a bad date would otherwise fail the whole chunk
+                str_to_date(task.get("due_date"))
+                adds.append((n, task))
+                if len(adds) >= args.chunk_size:
+                    flush_adds()
+                continue
+
+            flush_adds()
+            task_id = change.get("id")
+            if not isinstance(task_id, int):
+                raise CLIError("id is required")
+            if op == "update":
+                task = merged(db, task_id, task, user_email)
+                result = task and db.update_task(task_id, task, user_email)
+            elif op == "complete":
+                result = db.complete_task(task_id, user_email)
+            else:
+                result = db.delete_task(task_id, user_email)
+            if result is None:
+                raise CLIError(f"no task {task_id}")
+            emit({"op": op, "id": task_id} if op == "delete" else dict(op=op, **to_record(result)))
+            done += 1
+        except (ValueError, CLIError, db.backend.DatabaseError) as e:
+            emit({"line": n, "error": str(e)})
+            failed += 1
+    flush_adds()
+
+    seconds = time.perf_counter() - start
+    print(f"Applied {done} operations ({failed} failed) in {seconds:.2f}s", file=sys.stderr)
+    if failed:
+        raise SystemExit(1)
+
+
+def _changes(args):
+    """
+    The task fields given as options, in TaskDB's write shape.
+    """
+    return {f: getattr(args, f) for f in FIELDS if getattr(args, f, None) is not None}
+
+
+# ================= ARGUMENTS =================
+
+def _task_options(parser, title_required=False):
+    parser.add_argument("--title", required=title_required)
+    parser.add_argument("--description")
+    parser.add_argument("--due-date", dest="due_date", metavar="YYYY-MM-DD")
+    parser.add_argument("--priority", choices=list(PRIORITY_RANK))
+    parser.add_argument("--category")
+    parser.add_argument("--status", choices=STATUS_OPTIONS)
+    parser.add_argument("--recurrence", choices=RECURRENCE_OPTIONS)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Task Manager from the command line")
+    parser.add_argument("--user", help="account email (password from TASKMANAGER_PASSWORD)")
+    parser.add_argument("--token", help="session token (default: TASKMANAGER_TOKEN)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("list", help="print tasks, full descriptions included")
+    p.add_argument("--category")
+    p.add_argument("--status", choices=STATUS_OPTIONS)
+    p.add_argument("--due-before", metavar="YYYY-MM-DD",
+                   help="only open tasks due on or before this date, one line per "
+                        "occurrence (with its date), soonest first")
+    p.add_argument("--due-after", metavar="YYYY-MM-DD",
+                   help="with --due-before: only occurrences on or after this date")
+    p.set_defaults(run=cmd_list)
+
+    p = commands.add_parser("add", help="add one task")
+    _task_options(p, title_required=True)
+    p.set_defaults(run=cmd_add)
+
+    p = commands.add_parser("update", help="change fields of one task")
+    p.add_argument("id", type=int)
+    _task_options(p)
+    p.set_defaults(run=cmd_update)
+
+    p = commands.add_parser("complete", help="complete tasks (recurring ones move on)")
+    p.add_argument("ids", type=int, nargs="+")
+    p.set_defaults(run=cmd_complete)
+
+    p = commands.add_parser("delete", help="delete tasks")
+    p.add_argument("ids", type=int, nargs="+")
+    p.set_defaults(run=cmd_delete)
+
+    p = commands.add_parser("search", help="full-text search, best matches first")
+    p.add_argument("text")
+    p.add_argument("--limit", type=int, default=100)
+    p.set_defaults(run=cmd_search)
+
+    p = commands.add_parser("stats", help="task counts by status and category")
+    p.set_defaults(run=cmd_stats)
+
+    p = commands.add_parser("batch", help="apply JSON Lines operations from stdin")
+    p.add_argument("--chunk-size", type=int, default=1000)
+    p.set_defaults(run=cmd_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        user_email = authenticate(args, AuthDB())
+        args.run(TaskDB(), user_email, args)
+    except (CLIError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Thin client of service.py with the TaskDB and AuthDB methods the GUI uses,
+so TaskManagerGUI can run against the service without database access.
+user_email arguments are kept for the same signatures; the service acts
+for whoever the session token belongs to.
+"""
+import http.client
+import json
+import threading
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+import config
+from auth_db import AuthDB
+from task_model import Task
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _Client:
+    """
+    JSON requests over one keep-alive connection per thread.
+    """
+
+    def __init__(self, url, token=None):
+        self.url = url
+        parts = urlsplit(url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.token = token
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, query=None, missing_ok=False):
+        """
+        Returns the decoded response, or None for a 404 when missing_ok.
+        Raises ServiceError for other error statuses.
+        """
+        if query:
+            path += "?" + urlencode({k: v for k, v in query.items() if v is not None})
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        data = None if body is None else json.dumps(body).encode()
+
+        conn = getattr(self._local, "conn", None)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                conn = self._local.conn = cls(self.host, self.port, timeout=config.POOL_TIMEOUT * 3)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                conn = self._local.conn = None
+                # The service may drop an idle keep-alive connection; retry once on a fresh one
+                if not reused:
+                    raise
+                reused = False
+
+        result = json.loads(payload) if payload else None
+        if response.status == 404 and missing_ok:
+            return None
+        if response.status >= 400:
+            message = result.get("error") if isinstance(result, dict) else response.reason
+            raise ServiceError(response.status, message)
+        return result
+
+
+class RemoteTaskDB(_Client):
+    # ================= READS =================
+
+    def get_tasks(self, user_email):
+        return _tasks(self.request("GET", "/tasks")["tasks"])
+
+    def get_tasks_page(self, user_email, limit, after=None, full=False):
+        result = self.request("GET", "/tasks", query={
+            "limit": limit,
+            "after": ",".join(map(str, after)) if after else None,
+            "full": 1 if full else None,
+        })
+        cursor = result["cursor"]
+        return _tasks(result["tasks"]), tuple(cursor) if cursor else None
+
+    def iter_tasks(self, user_email, page_size=1000, full=False):
+        cursor = None
+        while True:
+            tasks, cursor = self.get_tasks_page(user_email, page_size, cursor, full)
+            yield from tasks
+            if cursor is None:
+                return
+
+    def get_task(self, task_id, user_email):
+        return _task(self.request("GET", f"/tasks/{task_id}", missing_ok=True))
+
+    def get_description(self, task_id, user_email):
+        result = self.request("GET", f"/tasks/{task_id}/description", missing_ok=True)
+        return result and result["description"]
+
+    def get_counts(self, user_email):
+        return {(c, s): n for c, s, n in self.request("GET", "/counts")}
+
+    def search(self, user_email, text, limit=100):
+        return _tasks(self.request("GET", "/search", query={"q": text, "limit": limit}))
+
+    def get_due(self, user_email, until):
+        return _tasks(self.request("GET", "/due", query={"until": until.strftime("%Y-%m-%d")}))
+
+    # ================= WRITES =================
+
+    def add_task(self, task, user_email):
+        return _task(self.request("POST", "/tasks", task))
+
+    def update_task(self, task_id, task, user_email):
+        return _task(self.request("PUT", f"/tasks/{task_id}", task, missing_ok=True))
+
+    def complete_task(self, task_id, user_email):
+        return _task(self.request("POST", f"/tasks/{task_id}/complete", {}, missing_ok=True))
+
+    def delete_task(self, task_id, user_email):
+        result = self.request("DELETE", f"/tasks/{task_id}", missing_ok=True)
+        return result and result["id"]
+
+    def update_tasks(self, task_ids, changes, user_email):
+        return _tasks(self.request("POST", "/tasks/update", {"ids": list(task_ids), "changes": changes}))
+
+    def delete_tasks(self, task_ids, user_email):
+        return self.request("POST", "/tasks/delete", {"ids": list(task_ids)})["ids"]
+
+    def write_batch(self, ops, user_email):
+        return [{"before": _tasks(r["before"]), "after": _tasks(r["after"])}
+                for r in self.request("POST", "/tasks/batch", {"ops": ops})]
+
+
+def _task(d):
+    return Task.from_dict(d) if d is not None else None
+
+
+def _tasks(ds):
+    return [Task.from_dict(d) for d in ds]
+
+
+class RemoteAuthDB(_Client):
+    """
+    The service starts a session on every login (its requests need one);
+    create_session hands back that session rather than opening another.
+    """
+
+    def register(self, email, password):
+        return self.request("POST", "/register", {"email": email, "password": password})["ok"]
+
+    def login(self, email, password):
+        try:
+            result = self.request("POST", "/login", {"email": email, "password": password})
+        except ServiceError as e:
+            if e.status == 401:
+                return False
+            raise
+        self.session = (result["token"], datetime.fromisoformat(result["expires_at"]))
+        return True
+
+    def create_session(self, email, days=None):
+        return self.session
+
+    def validate_session(self, token):
+        try:
+            return _Client(self.url, token).request("GET", "/session")["email"]
+        except ServiceError as e:
+            if e.status == 401:
+                return None
+            raise
+
+    def revoke_session(self, token):
+        _Client(self.url, token).request("DELETE", "/session")
+
+
+def open_auth_db():
+    """
+    The service's auth endpoints in thin-client mode, the database otherwise.
+    """
+    return RemoteAuthDB(config.SERVICE_URL) if config.SERVICE_URL else AuthDB()
@@ -0,0 +1,91 @@
+import os
+
+# ================= DATABASE =================
+# Storage engine used by TaskDB and AuthDB: "oracle" or "sqlite"
+DB_BACKEND = os.environ.get("TASKMANAGER_DB", "oracle")
+
+# Oracle server (the original hard-wired connection)
+ORACLE_USER = os.environ.get("TASKMANAGER_ORACLE_USER", "system")
+ORACLE_PASSWORD = os.environ.get("TASKMANAGER_ORACLE_PASSWORD", "system")
+ORACLE_DSN = os.environ.get("TASKMANAGER_ORACLE_DSN", "localhost:1522/XE")
+
+# Embedded SQLite database file (":memory:" is not shared between connections)
+SQLITE_PATH = os.environ.get("TASKMANAGER_SQLITE_PATH", "tasks.db")
+
+# ================= CONNECTION POOL =================
+# One pool per process, shared by TaskDB and AuthDB
+POOL_MIN = int(os.environ.get("TASKMANAGER_POOL_MIN", "1"))
+POOL_MAX = int(os.environ.get("TASKMANAGER_POOL_MAX", "4"))
+# Seconds to wait for a free connection before giving up
+POOL_TIMEOUT = float(os.environ.get("TASKMANAGER_POOL_TIMEOUT", "10"))
+# Idle connections older than this (seconds) are pinged before reuse
+POOL_PING_INTERVAL = float(os.environ.get("TASKMANAGER_POOL_PING_INTERVAL", "60"))
+
+# ================= UI =================
+# Only materialize the visible rows of the task table (plain Treeview when off)
+VIRTUAL_TABLE = os.environ.get("TASKMANAGER_VIRTUAL_TABLE", "1") != "0"
+# Tasks fetched per page; further pages load on scroll (0 loads everything at once)
+PAGE_SIZE = int(os.environ.get("TASKMANAGER_PAGE_SIZE", "500"))
+# Description characters read by list queries; the rest is fetched when a task is opened
+DESCRIPTION_PREFIX = int(os.environ.get("TASKMANAGER_DESCRIPTION_PREFIX", "200"))
+# Most search results shown (best matches first)
+SEARCH_LIMIT = int(os.environ.get("TASKMANAGER_SEARCH_LIMIT", "500"))
+# Full descriptions kept in memory after opening a task
+DESCRIPTION_CACHE_SIZE = int(os.environ.get("TASKMANAGER_DESCRIPTION_CACHE_SIZE", "64"))
+
+# ================= REMINDERS =================
+# Hour of the due day at which a task's reminder goes off
+REMINDER_HOUR = int(os.environ.get("TASKMANAGER_REMINDER_HOUR", "9"))
+# Days ahead whose due tasks are held in the reminder queue (refetched as time passes)
+REMINDER_LOOKAHEAD_DAYS = int(os.environ.get("TASKMANAGER_REMINDER_LOOKAHEAD_DAYS", "7"))
+
+# ================= TASK SERVICE =================
+# URL of a running service.py; when set the GUI is a thin client of it and
+# opens no database connection of its own
+SERVICE_URL = os.environ.get("TASKMANAGER_SERVICE_URL", "")
+# Where service.py listens
+SERVICE_HOST = os.environ.get("TASKMANAGER_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("TASKMANAGER_SERVICE_PORT", "8765"))
+# Users whose task lists and counts the service keeps in memory
+SERVICE_CACHE_USERS = int(os.environ.get("TASKMANAGER_SERVICE_CACHE_USERS", "256"))
+# Seconds a checked session token is trusted before AuthDB is asked again
+SERVICE_TOKEN_TTL = float(os.environ.get("TASKMANAGER_SERVICE_TOKEN_TTL", "60"))
+
+# ================= BACKGROUND DB WORK =================
+# Threads running TaskDB calls for the GUI (1 keeps writes in order)
+DB_WORKER_THREADS = int(os.environ.get("TASKMANAGER_DB_WORKER_THREADS", "1"))
+# How often (ms) the Tk loop collects finished DB calls while any are in flight
+DB_WORKER_POLL_MS = int(os.environ.get("TASKMANAGER_DB_WORKER_POLL_MS", "30"))
+# GUI edits made less than this many ms apart are committed in one transaction
+GROUP_COMMIT_MS = int(os.environ.get("TASKMANAGER_GROUP_COMMIT_MS", "250"))
+# Longest an edit is held back waiting for others (ms)
+GROUP_COMMIT_MAX_MS = int(os.environ.get("TASKMANAGER_GROUP_COMMIT_MAX_MS", "1000"))
+# Committed changes the GUI can undo
+UNDO_LIMIT = int(os.environ.get("TASKMANAGER_UNDO_LIMIT", "100"))
+
+# ================= METRICS =================
+# File that metric snapshots are appended to (JSON lines); empty disables dumping
+METRICS_LOG = os.environ.get("TASKMANAGER_METRICS_LOG", "")
+
+# ================= SESSIONS =================
+# Where the signed login token and its signing key are kept
+SESSION_DIR = os.environ.get(
+    "TASKMANAGER_SESSION_DIR", os.path.join(os.path.expanduser("~"), ".taskmanager")
+)
+# Days a "keep me signed in" session stays valid
+SESSION_DAYS = int(os.environ.get("TASKMANAGER_SESSION_DAYS", "14"))
+
+# ================= LOCAL CACHE =================
+# Keep a SQLite replica of the user's tasks and sync it to the server in the
+# background, so the GUI keeps working while the server is slow or down
+LOCAL_CACHE = os.environ.get(
+    "TASKMANAGER_LOCAL_CACHE", "1" if DB_BACKEND == "oracle" else "0"
+) != "0"
+# Where the per-user replica files are kept
+CACHE_DIR = os.environ.get("TASKMANAGER_CACHE_DIR", SESSION_DIR)
+# Seconds between sync rounds (a local write starts one right away)
+SYNC_INTERVAL = float(os.environ.get("TASKMANAGER_SYNC_INTERVAL", "10"))
+# Longest wait between retries while the server is unreachable
+SYNC_MAX_BACKOFF = float(os.environ.get("TASKMANAGER_SYNC_MAX_BACKOFF", "300"))
+# Outbox entries sent to the server per transaction
+SYNC_BATCH_SIZE = int(os.environ.get("TASKMANAGER_SYNC_BATCH_SIZE", "200"))
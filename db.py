@@ -1,156 +1,699 @@
-import oracledb
+import time
 from datetime import datetime
 
+import config
+from metrics import METRICS, timed
+from migrations import migrate
+from pool import get_pool
+from recurrence import RULES, next_occurrence
+from task_model import Task, date_str
+from utils import PRIORITY_RANK
+
+# Ids bound into one "id IN (...)" list; Oracle allows at most 1000
+IN_CHUNK = 500
+
+# Fields update_tasks can set on many tasks at once
+BULK_FIELDS = ("status", "category", "priority")
+
+TASK_COLUMNS = "id, title, description, due_date, priority, category, status, recurrence, next_due"
+
+INSERT_TASK_SQL = """
+INSERT INTO tasks
+(user_email, title, description, due_date, priority, category, status, priority_rank,
+ version, recurrence, next_due)
+VALUES (:user_email, :title, :description, :due_date, :priority, :category, :status,
+        :priority_rank, :version, :recurrence, :next_due)
+"""
+
+# apply_changes: a synced add, tagged with the client's outbox op id
+INSERT_SYNCED_TASK_SQL = """
+INSERT INTO tasks
+(user_email, title, description, due_date, priority, category, status, priority_rank,
+ version, recurrence, next_due, client_op)
+VALUES (:user_email, :title, :description, :due_date, :priority, :category, :status,
+        :priority_rank, :version, :recurrence, :next_due, :client_op)
+"""
+
+UPDATE_TASK_SQL = """
+UPDATE tasks
+SET title = :title,
+    description = :description,
+    due_date = :due_date,
+    priority = :priority,
+    category = :category,
+    status = :status,
+    priority_rank = :priority_rank,
+    version = :version,
+    recurrence = :recurrence,
+    next_due = :next_due
+WHERE id = :id AND user_email = :user_email
+"""
+
+
+def new_version():
+    """
+    Version stamp for a write: wall-clock milliseconds, so that between two
+    writers of the same row the later one wins (see TaskDB.apply_changes).
+    """
+    return int(time.time() * 1000)
+
 
 class TaskDB:
-    def __init__(self):
-        self.conn = oracledb.connect(
-            user="system",
-            password="system",
-            dsn="localhost:1522/XE"
+    def __init__(self, pool=None, tombstones=True):
+        self.pool = pool or get_pool()
+        self.backend = self.pool.backend
+        # Record deletes in task_tombstones for replicas to pull (off for a replica itself)
+        self.tombstones = tombstones
+        # List queries read one character past the prefix to tell whether it was cut
+        prefix = self.backend.DESCRIPTION_PREFIX_SQL.format(length=config.DESCRIPTION_PREFIX + 1)
+        self.list_columns = (
+            f"id, title, {prefix}, due_date, priority, category, status, recurrence, next_due"
         )
-        self._create_tables()
-        self._ensure_user_email_column()
+        migrate(self.pool)
+
+    # ================= CRUD =================
+
+    @timed("TaskDB.add_task")
+    def add_task(self, task, user_email):
+        """
+        task keys expected (lowercase): title, description, due_date, priority, category, status
+        Returns the stored task (same shape as get_tasks rows) including its new ID.
+        """
+        params = self._task_params(task)
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            task_id = self.backend.insert_returning_id(
+                cur, INSERT_TASK_SQL, dict(params, user_email=user_email)
+            )
+            conn.commit()
+        return self._params_to_task(task_id, params)
+
+    @timed("TaskDB.add_tasks")
+    def add_tasks(self, tasks, user_email):
+        """
+        Inserts many tasks with one executemany in a single transaction.
+        Returns the number of rows inserted.
+        """
+        rows = [dict(self._task_params(t), user_email=user_email) for t in tasks]
+        if not rows:
+            return 0
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.executemany(INSERT_TASK_SQL, rows)
+            conn.commit()
+        return len(rows)
+
+    @timed("TaskDB.update_task")
+    def update_task(self, task_id, task, user_email):
+        """
+        Returns the updated task, or None if no row matched (e.g. it was deleted elsewhere).
+        Completing a recurring task moves it on to its next occurrence instead.
+        """
+        params = self._task_params(task)
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            if params["recurrence"] and not self._resolve_recurrence(cur, task_id, user_email, params):
+                return None
+            cur.execute(UPDATE_TASK_SQL, dict(params, id=task_id, user_email=user_email))
+            updated = cur.rowcount
+            conn.commit()
+        return self._params_to_task(task_id, params) if updated else None
+
+    @timed("TaskDB.complete_task")
+    def complete_task(self, task_id, user_email):
+        """
+        Marks a task Completed; a recurring one advances next_due to its
+        next occurrence and stays Pending. Returns the task, or None if no row matched.
+        """
+        task = self.get_task(task_id, user_email)
+        if task is None:
+            return None
+        return self.update_task(
+            task_id, dict(task_input(task), status="Completed", next_due=None), user_email
+        )
+
+    @timed("TaskDB.delete_task")
+    def delete_task(self, task_id, user_email):
+        """
+        Returns the deleted task ID, or None if no row matched.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM tasks WHERE id = :id AND user_email = :user_email",
+                        {"id": task_id, "user_email": user_email})
+            deleted = cur.rowcount
+            if deleted:
+                self._bury(cur, [task_id], user_email, new_version())
+            conn.commit()
+        return task_id if deleted else None
+
+    # ================= BULK =================
+
+    @timed("TaskDB.update_tasks")
+    def update_tasks(self, task_ids, changes, user_email):
+        """
+        Applies the same changes (any of BULK_FIELDS) to many tasks in one
+        transaction, as one set-based UPDATE per IN_CHUNK ids. Completing a
+        recurring task moves it on to its next occurrence, as complete_task
+        does. Returns the updated tasks; ids that matched no row are left out.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            tasks = self._update_tasks(cur, task_ids, changes, user_email, new_version())
+            conn.commit()
+        return tasks
 
-    def _create_tables(self):
+    @timed("TaskDB.delete_tasks")
+    def delete_tasks(self, task_ids, user_email):
         """
-        Oracle does not support CREATE TABLE IF NOT EXISTS.
-        We safely ignore ORA-00955 (name already exists).
+        Deletes many tasks in one transaction; returns the IDs that existed.
         """
-        cur = self.conn.cursor()
-        try:
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            deleted = self._delete_tasks(cur, task_ids, user_email)
+            conn.commit()
+        return deleted
+
+    # ================= JOURNAL =================
+
+    @timed("TaskDB.write_batch")
+    def write_batch(self, ops, user_email):
+        """
+        Applies a list of writes in one transaction and one commit (group
+        commit). Each op is a dict:
+            {"op": "add", "task": {...}}                      as add_task
+            {"op": "update", "id": n, "task": {...}}          as update_task
+            {"op": "restore", "id": n, "task": {...}}         the row exactly as given
+            {"op": "update_many", "ids": [...], "changes": {...}}  as update_tasks
+            {"op": "delete", "ids": [...]}
+        Returns one {"before": [...], "after": [...]} per op: the full rows it
+        touched as they were before and after it, which is what undo needs.
+        A row only in "before" was deleted, one only in "after" added. If an
+        op fails nothing is written.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            results = [self._write_op(cur, op, user_email) for op in ops]
+            conn.commit()
+        METRICS.incr("TaskDB.write_batch.ops", len(ops))
+        return results
+
+    def _write_op(self, cur, op, user_email):
+        kind = op["op"]
+        if kind == "add":
+            params = self._task_params(op["task"])
+            task_id = self.backend.insert_returning_id(
+                cur, INSERT_TASK_SQL, dict(params, user_email=user_email)
+            )
+            return {"before": [], "after": [self._params_to_task(task_id, params)]}
+
+        if kind in ("update", "restore"):
+            before = self._select_tasks(cur, [op["id"]], user_email)
+            if not before:
+                return {"before": [], "after": []}
+            params = self._task_params(op["task"])
+            # A restore puts back next_due and status as they were
+            if kind == "update" and params["recurrence"]:
+                self._resolve_recurrence(cur, op["id"], user_email, params)
+            cur.execute(UPDATE_TASK_SQL, dict(params, id=op["id"], user_email=user_email))
+            return {"before": before, "after": [self._params_to_task(op["id"], params)]}
+
+        if kind == "update_many":
+            before = self._select_tasks(cur, op["ids"], user_email)
+            after = self._update_tasks(cur, op["ids"], op["changes"], user_email, new_version())
+            return {"before": before, "after": after}
+
+        if kind == "delete":
+            before = self._select_tasks(cur, op["ids"], user_email)
+            self._delete_tasks(cur, [t.id for t in before], user_email)
+            return {"before": before, "after": []}
+
+        raise ValueError(f"Unknown write op {kind!r}")
+
+    @timed("TaskDB.get_tasks")
+    def get_tasks(self, user_email):
+        """
+        Returns tasks for a specific user, sorted by priority (High > Medium > Low) then newest first.
+        Descriptions are cut to config.DESCRIPTION_PREFIX characters (see get_description).
+        """
+        with self.pool.connection() as conn, METRICS.timer("TaskDB.get_tasks.query"):
+            cur = conn.cursor()
+            cur.execute(f"""
+            SELECT {self.list_columns}
+            FROM tasks
+            WHERE user_email = :user_email
+            ORDER BY priority_rank DESC, id DESC
+            """, {"user_email": user_email})
+            rows = cur.fetchall()
+
+        self._count_fetched("TaskDB.get_tasks", rows)
+        return [self._row_to_list_task(r) for r in rows]
+
+    @timed("TaskDB.get_tasks_page")
+    def get_tasks_page(self, user_email, limit, after=None, full=False):
+        """
+        One page of get_tasks, read with a keyset on (priority_rank, id) so every
+        page is a range scan of tasks_user_rank_idx, however deep it is.
+        after is the cursor returned with the previous page (None for the first).
+        full reads whole descriptions instead of their prefix.
+        Returns (tasks, cursor); cursor is None once the last page was read.
+        """
+        params = {"user_email": user_email, "limit": limit}
+        keyset = ""
+        if after is not None:
+            keyset = """
+            AND priority_rank <= :after_rank
+            AND (priority_rank < :after_rank OR id < :after_id)
+            """
+            params["after_rank"], params["after_id"] = after
+
+        with self.pool.connection() as conn, METRICS.timer("TaskDB.get_tasks_page.query"):
+            cur = conn.cursor()
+            cur.execute(f"""
+            SELECT {TASK_COLUMNS if full else self.list_columns}
+            FROM tasks
+            WHERE user_email = :user_email
+            {keyset}
+            ORDER BY priority_rank DESC, id DESC
+            {self.backend.LIMIT_SQL}
+            """, params)
+            rows = cur.fetchall()
+
+        self._count_fetched("TaskDB.get_tasks_page", rows)
+
+        to_task = self._row_to_task if full else self._row_to_list_task
+        tasks = [to_task(r) for r in rows]
+        cursor = None
+        if len(rows) == limit:
+            last = tasks[-1]
+            cursor = (PRIORITY_RANK.get(last["PRIORITY"], 0), last["ID"])
+        return tasks, cursor
+
+    @timed("TaskDB.get_counts")
+    def get_counts(self, user_email):
+        """
+        Number of tasks per (category, status), from one GROUP BY over
+        tasks_user_counts_idx; no task rows or descriptions are read.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+            SELECT category, status, COUNT(*)
+            FROM tasks
+            WHERE user_email = :user_email
+            GROUP BY category, status
+            """, {"user_email": user_email})
+            return {(c, s): n for c, s, n in cur.fetchall()}
+
+    @timed("TaskDB.get_task")
+    def get_task(self, task_id, user_email):
+        """
+        One task with its full description, or None if there is no such task.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+            SELECT {TASK_COLUMNS} FROM tasks
+            WHERE id = :id AND user_email = :user_email
+            """, {"id": task_id, "user_email": user_email})
+            row = cur.fetchone()
+        return self._row_to_task(row) if row else None
+
+    @timed("TaskDB.get_description")
+    def get_description(self, task_id, user_email):
+        """
+        The full description of one task (list queries only return a prefix),
+        or None if there is no such task.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
             cur.execute("""
-            CREATE TABLE tasks (
-                id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                user_email VARCHAR2(200) NOT NULL,
-                title VARCHAR2(200) NOT NULL,
-                description CLOB,
-                due_date DATE,
-                priority VARCHAR2(20),
-                category VARCHAR2(50),
-                status VARCHAR2(20)
+            SELECT description FROM tasks
+            WHERE id = :id AND user_email = :user_email
+            """, {"id": task_id, "user_email": user_email})
+            row = cur.fetchone()
+        if row is None:
+            return None
+        METRICS.incr("TaskDB.get_description.lob_bytes", len((row[0] or "").encode("utf-8")))
+        return row[0] or ""
+
+    @timed("TaskDB.get_due")
+    def get_due(self, user_email, until):
+        """
+        Open tasks whose next_due is on or before until, soonest first; a
+        range scan of tasks_user_next_due_idx. recurrence.expand turns these
+        into the individual occurrences of a window.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+            SELECT {self.list_columns}
+            FROM tasks
+            WHERE user_email = :user_email AND next_due <= :until
+            ORDER BY next_due, id
+            """, {"user_email": user_email, "until": until})
+            rows = cur.fetchall()
+
+        self._count_fetched("TaskDB.get_due", rows)
+        return [self._row_to_list_task(r) for r in rows]
+
+    @timed("TaskDB.search")
+    def search(self, user_email, text, limit=100):
+        """
+        Full-text search of titles and descriptions, best matches first.
+        Words match as prefixes, "quoted text" as a phrase, and every term
+        must match. Returns at most limit tasks (list-query shape).
+        """
+        query = self.backend.search_query(text)
+        if query is None:
+            return []
+        with self.pool.connection() as conn, METRICS.timer("TaskDB.search.query"):
+            cur = conn.cursor()
+            cur.execute(
+                self.backend.SEARCH_SQL.format(columns=self.list_columns) + self.backend.LIMIT_SQL,
+                {"user_email": user_email, "query": query, "limit": limit}
             )
-            """)
-            self.conn.commit()
-        except oracledb.DatabaseError as e:
-            error, = e.args
-            if error.code != 955:  # ORA-00955: name already used
-                raise
-
-    def _ensure_user_email_column(self):
-        """
-        If the table already existed without user_email or other columns,
-        try adding them. Ignore errors if they already exist.
-        """
-        cur = self.conn.cursor()
-
-        def safe_add(column_sql):
-            try:
-                cur.execute(f"ALTER TABLE tasks ADD ({column_sql})")
-                self.conn.commit()
-            except oracledb.DatabaseError:
-                # Ignore if column already exists or other non-critical issues
-                pass
-
-        safe_add("user_email VARCHAR2(200) NOT NULL")
-        safe_add("title VARCHAR2(200) NOT NULL")
-        safe_add("description CLOB")
-        safe_add("due_date DATE")
-        safe_add("priority VARCHAR2(20)")
-        safe_add("category VARCHAR2(50)")
-        safe_add("status VARCHAR2(20)")
+            rows = cur.fetchall()
 
-    # ================= CRUD =================
+        self._count_fetched("TaskDB.search", rows)
+        return [self._row_to_list_task(r) for r in rows]
 
-    def add_task(self, task, user_email):
+    def iter_tasks(self, user_email, page_size=1000, full=False):
         """
-        task keys expected (lowercase): title, description, due_date, priority, category, status
+        Yields all of a user's tasks in get_tasks order, one page in memory at a time.
         """
-        cur = self.conn.cursor()
-        cur.execute("""
-        INSERT INTO tasks
-        (user_email, title, description, due_date, priority, category, status)
-        VALUES (:user_email, :title, :description, :due_date, :priority, :category, :status)
-        """, {
-            "user_email": user_email,
+        cursor = None
+        while True:
+            tasks, cursor = self.get_tasks_page(user_email, page_size, cursor, full)
+            yield from tasks
+            if cursor is None:
+                return
+
+    # ================= SYNC =================
+
+    @timed("TaskDB.apply_changes")
+    def apply_changes(self, changes, user_email):
+        """
+        Applies a batch of queued local writes in one transaction.
+        changes are dicts with op ("add", "update" or "delete"), id, task
+        (lowercase keys, as add_task takes) and version. Ids of tasks added
+        earlier in the same batch may be the client's temporary ones. An add
+        may carry an op_id; one already stored is answered with its row's id
+        instead of being inserted again, so a replayed push is harmless.
+
+        Updates and deletes are last-writer-wins: they only apply if the row's
+        version is older than the change's. Returns one (status, value) per change:
+            ("added", new_id)
+            ("applied", None)
+            ("stale", (task, version))  the server's newer row
+            ("missing", None)           no such row on the server
+        """
+        new_ids = {}
+        results = []
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            for change in changes:
+                op, version = change["op"], change["version"]
+                task_id = new_ids.get(change["id"], change["id"])
+
+                if op == "add":
+                    new_ids[task_id] = self._add_synced(cur, change, user_email)
+                    results.append(("added", new_ids[task_id]))
+                    continue
+
+                keys = {"id": task_id, "user_email": user_email, "version": version}
+                if op == "update":
+                    params = self._task_params(change["task"])
+                    cur.execute(UPDATE_TASK_SQL + " AND version < :version", dict(params, **keys))
+                else:
+                    cur.execute("""
+                    DELETE FROM tasks
+                    WHERE id = :id AND user_email = :user_email AND version < :version
+                    """, keys)
+                    if cur.rowcount:
+                        self._bury(cur, [task_id], user_email, version)
+
+                if cur.rowcount:
+                    results.append(("applied", None))
+                    continue
+                cur.execute(f"""
+                SELECT {TASK_COLUMNS}, version FROM tasks
+                WHERE id = :id AND user_email = :user_email
+                """, {"id": task_id, "user_email": user_email})
+                row = cur.fetchone()
+                if row is None:
+                    results.append(("missing", None))
+                else:
+                    results.append(("stale", (self._row_to_task(row), row[-1])))
+            conn.commit()
+        return results
+
+    @timed("TaskDB.get_changes")
+    def get_changes(self, user_email, since):
+        """
+        Tasks written with a version above since, as (task, version) pairs.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+            SELECT {TASK_COLUMNS}, version
+            FROM tasks
+            WHERE user_email = :user_email AND version > :since
+            """, {"user_email": user_email, "since": since})
+            rows = cur.fetchall()
+
+        self._count_fetched("TaskDB.get_changes", rows)
+        return [(self._row_to_task(r), r[-1]) for r in rows]
+
+    @timed("TaskDB.get_deletions")
+    def get_deletions(self, user_email, since):
+        """
+        Tasks deleted with a version above since, as (id, version) pairs.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+            SELECT id, version FROM task_tombstones
+            WHERE user_email = :user_email AND version > :since
+            """, {"user_email": user_email, "since": since})
+            return cur.fetchall()
+
+    # ================= HELPERS =================
+
+    def _in_chunks(self, task_ids):
+        """
+        Yields ("id IN (...)" bind list, bind values) per IN_CHUNK ids.
+        """
+        task_ids = list(task_ids)
+        for start in range(0, len(task_ids), IN_CHUNK):
+            binds = {f"id{i}": task_id for i, task_id in enumerate(task_ids[start:start + IN_CHUNK])}
+            yield ", ".join(f":{name}" for name in binds), binds
+
+    def _select_tasks(self, cur, task_ids, user_email):
+        """
+        The full rows of those of task_ids that exist, in no particular order.
+        """
+        rows = []
+        for in_list, binds in self._in_chunks(task_ids):
+            cur.execute(f"""
+            SELECT {TASK_COLUMNS} FROM tasks
+            WHERE user_email = :user_email AND id IN ({in_list})
+            """, dict(binds, user_email=user_email))
+            rows.extend(cur.fetchall())
+        return [self._row_to_task(r) for r in rows]
+
+    def _update_tasks(self, cur, task_ids, changes, user_email, version):
+        """
+        update_tasks inside the caller's transaction, with the given version.
+        """
+        unknown = set(changes) - set(BULK_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot bulk-update {', '.join(sorted(unknown))}")
+        sets = ["version = :version"]
+        params = {"version": version}
+        if "category" in changes:
+            sets.append("category = :category")
+            params["category"] = changes["category"]
+        if "priority" in changes:
+            sets += ["priority = :priority", "priority_rank = :priority_rank"]
+            params["priority"] = changes["priority"]
+            params["priority_rank"] = PRIORITY_RANK.get(changes["priority"], 0)
+        status = changes.get("status")
+        if status == "Completed":
+            # One-off tasks close; recurring ones stay open and advance (_advance_series)
+            sets.append("status = CASE WHEN recurrence IS NULL THEN :status ELSE 'Pending' END")
+            sets.append("next_due = CASE WHEN recurrence IS NULL THEN NULL ELSE next_due END")
+        elif status:
+            sets.append("status = :status")
+            sets.append("next_due = CASE WHEN recurrence IS NULL THEN due_date ELSE next_due END")
+        if status:
+            params["status"] = status
+
+        rows = []
+        for in_list, binds in self._in_chunks(task_ids):
+            where = f"user_email = :user_email AND id IN ({in_list})"
+            keys = dict(binds, user_email=user_email)
+            if status == "Completed":
+                self._advance_series(cur, where, keys)
+            cur.execute(f"UPDATE tasks SET {', '.join(sets)} WHERE {where}", dict(params, **keys))
+            cur.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE {where}", keys)
+            rows.extend(cur.fetchall())
+        return [self._row_to_task(r) for r in rows]
+
+    def _advance_series(self, cur, where, keys):
+        """
+        Moves the recurring tasks matched by where to their next occurrence.
+        """
+        cur.execute(f"""
+        SELECT id, due_date, recurrence, next_due FROM tasks
+        WHERE {where} AND recurrence IS NOT NULL
+        """, keys)
+        advanced = [
+            {"id": task_id, "next_due": next_occurrence(due_date, rule, next_due)}
+            for task_id, due_date, rule, next_due in cur.fetchall()
+        ]
+        if advanced:
+            cur.executemany("UPDATE tasks SET next_due = :next_due WHERE id = :id", advanced)
+
+    def _delete_tasks(self, cur, task_ids, user_email):
+        """
+        delete_tasks inside the caller's transaction.
+        """
+        deleted = []
+        for in_list, binds in self._in_chunks(task_ids):
+            where = f"user_email = :user_email AND id IN ({in_list})"
+            keys = dict(binds, user_email=user_email)
+            cur.execute(f"SELECT id FROM tasks WHERE {where}", keys)
+            deleted.extend(r[0] for r in cur.fetchall())
+            cur.execute(f"DELETE FROM tasks WHERE {where}", keys)
+        self._bury(cur, deleted, user_email, new_version())
+        return deleted
+
+    def _bury(self, cur, task_ids, user_email, version):
+        """
+        Records deleted tasks in task_tombstones (see get_deletions).
+        """
+        if self.tombstones and task_ids:
+            cur.executemany(
+                "INSERT INTO task_tombstones (id, user_email, version) VALUES (:id, :user_email, :version)",
+                [{"id": i, "user_email": user_email, "version": version} for i in task_ids]
+            )
+
+    def _add_synced(self, cur, change, user_email):
+        """
+        apply_changes' insert; returns the new id, or the id stored earlier
+        under the same op_id.
+        """
+        op_id = change.get("op_id")
+        if op_id is not None:
+            cur.execute(
+                "SELECT id FROM tasks WHERE user_email = :user_email AND client_op = :op_id",
+                {"user_email": user_email, "op_id": op_id}
+            )
+            row = cur.fetchone()
+            if row is not None:
+                return row[0]
+        params = dict(self._task_params(change["task"]), version=change["version"])
+        return self.backend.insert_returning_id(
+            cur, INSERT_SYNCED_TASK_SQL, dict(params, user_email=user_email, client_op=op_id)
+        )
+
+    def _count_fetched(self, name, rows):
+        """
+        Records rows fetched and description (CLOB) bytes read by a query,
+        counted as UTF-8.
+        """
+        METRICS.incr(f"{name}.rows", len(rows))
+        METRICS.incr(f"{name}.lob_bytes", sum(len(r[2].encode("utf-8")) for r in rows if r[2]))
+
+    def _task_params(self, task):
+        due_date = self._parse_date(task.get("due_date"))
+        status = task.get("status", "Pending")
+        # A series needs an anchor date
+        recurrence = task.get("recurrence") if due_date and task.get("recurrence") in RULES else None
+        if task.get("next_due") is not None:
+            next_due = self._parse_date(task["next_due"])
+        else:
+            next_due = due_date if recurrence or status != "Completed" else None
+        return {
             "title": task.get("title", ""),
             "description": task.get("description", ""),
-            "due_date": self._parse_date(task.get("due_date")),
+            "due_date": due_date,
             "priority": task.get("priority", "Medium"),
             "category": task.get("category", "General"),
-            "status": task.get("status", "Pending"),
-        })
-        self.conn.commit()
+            "status": status,
+            "priority_rank": PRIORITY_RANK.get(task.get("priority", "Medium"), 0),
+            "version": new_version(),
+            "recurrence": recurrence,
+            "next_due": next_due,
+        }
 
-    def update_task(self, task_id, task, user_email):
-        cur = self.conn.cursor()
+    def _resolve_recurrence(self, cur, task_id, user_email, params):
+        """
+        Fills in next_due for an update of a recurring task: the series keeps
+        its place unless its anchor or rule changed, and a Completed status
+        moves it to the following occurrence (staying Pending).
+        Returns False if the task does not exist.
+        """
         cur.execute("""
-        UPDATE tasks
-        SET title = :title,
-            description = :description,
-            due_date = :due_date,
-            priority = :priority,
-            category = :category,
-            status = :status
+        SELECT due_date, recurrence, next_due FROM tasks
         WHERE id = :id AND user_email = :user_email
-        """, {
-            "title": task.get("title", ""),
-            "description": task.get("description", ""),
-            "due_date": self._parse_date(task.get("due_date")),
-            "priority": task.get("priority", "Medium"),
-            "category": task.get("category", "General"),
-            "status": task.get("status", "Pending"),
-            "id": task_id,
-            "user_email": user_email
-        })
-        self.conn.commit()
+        """, {"id": task_id, "user_email": user_email})
+        row = cur.fetchone()
+        if row is None:
+            return False
+        due_date, recurrence, next_due = row
+        if (due_date, recurrence) == (params["due_date"], params["recurrence"]) and next_due:
+            params["next_due"] = next_due
+        if params["status"] == "Completed":
+            params["next_due"] = next_occurrence(
+                params["due_date"], params["recurrence"], params["next_due"]
+            )
+            params["status"] = "Pending"
+        return True
 
-    def delete_task(self, task_id, user_email):
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM tasks WHERE id = :id AND user_email = :user_email",
-                    {"id": task_id, "user_email": user_email})
-        self.conn.commit()
+    def _params_to_task(self, task_id, params):
+        return self._row_to_task((
+            task_id,
+            params["title"],
+            params["description"],
+            params["due_date"],
+            params["priority"],
+            params["category"],
+            params["status"],
+            params["recurrence"],
+            params["next_due"],
+        ))
 
-    def get_tasks(self, user_email):
+    def _row_to_list_task(self, r):
         """
-        Returns tasks for a specific user, sorted by priority (High > Medium > Low) then newest first.
+        _row_to_task for list queries: a description longer than the prefix
+        is cut and the task flagged with DESCRIPTION_TRUNCATED.
         """
-        cur = self.conn.cursor()
-        cur.execute("""
-        SELECT id, title, description, due_date, priority, category, status
-        FROM tasks
-        WHERE user_email = :user_email
-        ORDER BY
-            CASE priority
-                WHEN 'High' THEN 3
-                WHEN 'Medium' THEN 2
-                WHEN 'Low' THEN 1
-                ELSE 0
-            END DESC,
-            id DESC
-        """, {"user_email": user_email})
-
-        rows = cur.fetchall()
-        return [
-            {
-                "ID": r[0],
-                "TITLE": r[1],
-                "DESCRIPTION": r[2],
-                "DUE_DATE": r[3].strftime("%Y-%m-%d") if r[3] else "",
-                "PRIORITY": r[4],
-                "CATEGORY": r[5],
-                "STATUS": r[6]
-            }
-            for r in rows
-        ]
+        task = self._row_to_task(r)
+        if task.description and len(task.description) > config.DESCRIPTION_PREFIX:
+            task.description = task.description[:config.DESCRIPTION_PREFIX]
+            task.truncated = True
+        return task
 
-    # ================= HELPERS =================
+    def _row_to_task(self, r):
+        """
+        Maps a TASK_COLUMNS row to the Task read by the GUI.
+        """
+        return Task(r[0], r[1], r[2], date_str(r[3]), r[4], r[5], r[6], r[7], date_str(r[8]))
 
     def _parse_date(self, date_str):
         """
-        Converts 'YYYY-MM-DD' string to datetime for Oracle DATE type
+        Converts 'YYYY-MM-DD' string to datetime for the DATE column
         """
         if not date_str:
             return None
         return datetime.strptime(date_str, "%Y-%m-%d")
+
+
+def task_input(t):
+    """
+    A task as returned by TaskDB, in the lowercase dict shape its writes take.
+    """
+    return {k.lower(): v for k, v in t.items() if k not in ("ID", "DESCRIPTION_TRUNCATED")}
    
\ No newline at end of file
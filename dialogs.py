@@ -1,6 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+import config
+from metrics import METRICS
+from utils import RECURRENCE_OPTIONS
+
 # ===== COLORS (MATCH DASHBOARD CARDS) =====
 BG = "#1e293b"
 ENTRY_BG = "#020617"
@@ -21,7 +25,7 @@ class TaskDialog(tk.Toplevel):
         self.title(title)
         self.configure(bg=BG)
         self.resizable(False, False)
-        self.geometry("420x520")
+        self.geometry("420x590")
 
         self._build()
         self.grab_set()
@@ -55,6 +59,14 @@ class TaskDialog(tk.Toplevel):
         label("Due Date (YYYY-MM-DD)")
         entry(self.due_var)
 
+        self.recurrence_var = tk.StringVar(value=self.initial.get("RECURRENCE") or "None")
+        label("Repeat")
+        ttk.Combobox(
+            container, values=RECURRENCE_OPTIONS,
+            textvariable=self.recurrence_var,
+            state="readonly"
+        ).pack(fill=tk.X, ipady=3)
+
         self.cat_var = tk.StringVar(value=self.initial.get("CATEGORY", "General"))
         label("Category")
         ttk.Combobox(
@@ -92,13 +104,123 @@ class TaskDialog(tk.Toplevel):
         if not self.title_var.get().strip():
             messagebox.showwarning("Validation", "Title is required")
             return
+        recurrence = self.recurrence_var.get()
+        if recurrence != "None" and not self.due_var.get().strip():
+            messagebox.showwarning("Validation", "A repeating task needs a due date")
+            return
         # Lowercase keys for DB adapter expectation
         self.result = {
             "title": self.title_var.get().strip(),
             "description": self.desc_var.get().strip(),
             "due_date": self.due_var.get().strip() or None,
+            "recurrence": None if recurrence == "None" else recurrence,
             "priority": self.priority_var.get(),
             "category": self.cat_var.get().strip(),
             "status": self.status_var.get(),
         }
         self.destroy()
+
+
+class BulkEditDialog(tk.Toplevel):
+    """
+    The fields TaskDB.update_tasks can set on many tasks at once. A field
+    left at KEEP is not changed; result is the dict of the others.
+    """
+    KEEP = "(keep)"
+
+    def __init__(self, parent, count):
+        super().__init__(parent)
+        self.result = None
+
+        self.title(f"Change {count} Tasks")
+        self.configure(bg=BG)
+        self.resizable(False, False)
+
+        self._build()
+        self.grab_set()
+
+    def _build(self):
+        container = tk.Frame(self, bg=BG)
+        container.pack(fill=tk.BOTH, expand=True, padx=30, pady=25)
+
+        self.vars = {}
+        for field, text, options in (
+            ("category", "Category", CATEGORIES),
+            ("priority", "Priority", PRIORITIES),
+            ("status", "Status", STATUSES),
+        ):
+            tk.Label(container, text=text, fg=TEXT, bg=BG,
+                     font=("Segoe UI", 10, "bold")).pack(anchor="w", pady=(10, 3))
+            self.vars[field] = tk.StringVar(value=self.KEEP)
+            ttk.Combobox(
+                container, values=[self.KEEP] + options,
+                textvariable=self.vars[field],
+                state="readonly"
+            ).pack(fill=tk.X, ipady=3)
+
+        tk.Button(
+            container, text="Apply",
+            bg=ACCENT, fg="white",
+            relief=tk.FLAT,
+            font=("Segoe UI", 11, "bold"),
+            command=self._save
+        ).pack(pady=25, fill=tk.X)
+
+    def _save(self):
+        changes = {f: v.get() for f, v in self.vars.items() if v.get() != self.KEEP}
+        if not changes:
+            messagebox.showwarning("Validation", "Choose at least one field to change")
+            return
+        self.result = changes
+        self.destroy()
+
+
+class DebugPanel(tk.Toplevel):
+    """
+    Live view of METRICS (Ctrl+Shift+D in the dashboard).
+    """
+    REFRESH_MS = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Metrics")
+        self.configure(bg=BG)
+        self.geometry("760x520")
+
+        self.text = tk.Text(self, bg=ENTRY_BG, fg=TEXT, font=("Consolas", 10),
+                            relief=tk.FLAT, wrap="none")
+        self.text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+
+        btns = tk.Frame(self, bg=BG)
+        btns.pack(pady=10)
+        tk.Button(btns, text="Reset", command=self._reset).pack(side=tk.LEFT, padx=5)
+        tk.Button(btns, text="Dump to log", command=self._dump).pack(side=tk.LEFT, padx=5)
+
+        self.refresh_after = None
+        self._refresh()
+
+    def destroy(self):
+        # A timer left armed would fire into the destroyed window
+        if self.refresh_after:
+            self.after_cancel(self.refresh_after)
+            self.refresh_after = None
+        super().destroy()
+
+    def _refresh(self):
+        self._show()
+        self.refresh_after = self.after(self.REFRESH_MS, self._refresh)
+
+    def _show(self):
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", METRICS.report())
+
+    def _reset(self):
+        METRICS.reset()
+        self._show()
+
+    def _dump(self):
+        if not config.METRICS_LOG:
+            messagebox.showinfo("Metrics", "Set TASKMANAGER_METRICS_LOG to enable the log file", parent=self)
+            return
+        METRICS.dump()
+        messagebox.showinfo("Metrics", f"Appended to {config.METRICS_LOG}", parent=self)
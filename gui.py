@@ -1,7 +1,22 @@
+import bisect
+import time
+from concurrent.futures import wait
+from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import ttk, messagebox
-from dialogs import TaskDialog
+import config
+from client import RemoteTaskDB, open_auth_db
+from dialogs import BulkEditDialog, DebugPanel, TaskDialog
 from db import TaskDB
+from journal import Journal
+from metrics import METRICS, timed
+from reminders import ReminderQueue
+from sessions import clear_local_session
+from sync import CachedTaskDB
+from task_model import Task
+from task_store import LRUCache, SortOrder, TaskCounts, TaskStore, task_sort_key
+from task_table import TaskTable, VirtualTaskTable
+from worker import DBWorker
 
 # ================= COLORS =================
 BG = "#0f172a"
@@ -11,9 +26,14 @@ TEXT = "#e5e7eb"
 ACCENT = "#6366f1"
 ENTRY = "#020617"
 
+ROW_HEIGHT = 25
+# Typing pause (ms) before the search box queries the database
+SEARCH_DELAY_MS = 200
+# Longest single reminder timer, so a machine woken from sleep catches up within the hour
+REMINDER_MAX_WAIT_MS = 60 * 60 * 1000
 
 class TaskManagerGUI(tk.Tk):
-    def __init__(self, user_email):
+    def __init__(self, user_email, session_token=None, verify_session=False):
         super().__init__()
 
         self.title("Task Manager")
@@ -21,12 +41,62 @@ class TaskManagerGUI(tk.Tk):
         self.configure(bg=BG)
 
         self.user_email = user_email
-        self.db = TaskDB()
-        self.tasks = []
+        self.session_token = session_token
+        # The task service (thin client), a local replica synced in the
+        # background, or straight to the server
+        if config.SERVICE_URL:
+            self.db = RemoteTaskDB(config.SERVICE_URL, session_token)
+        elif config.LOCAL_CACHE:
+            self.db = CachedTaskDB(user_email)
+        else:
+            self.db = TaskDB()
+        self.sync = getattr(self.db, "sync", None)
+        self.sync_generation = 0
+        self.store = TaskStore()
+        # Server-side totals; the store may only hold the first pages
+        self.counts = TaskCounts()
+        # Full descriptions of recently opened tasks (lists only carry a prefix)
+        self.descriptions = LRUCache(config.DESCRIPTION_CACHE_SIZE)
+        # (text, ranked task IDs) of the last search, and its pending debounce
+        self.search_results = None
+        self.search_after = None
         self.current_category = None
+        # Columns picked by clicking the table headings (empty: default order)
+        self.sort_order = SortOrder()
+        # Keyset cursor of the next page still on the server (None = all loaded)
+        self.page_cursor = None
+        # Cursor of the page being fetched, or "rest" while fetching all of them
+        self.page_request = None
+        # Due tasks of the next few days; one after() timer is armed for the earliest
+        self.reminders = ReminderQueue(config.REMINDER_HOUR)
+        self.reminder_after = None
+        self.reminder_armed = None
+        # When the lookahead window runs out and get_due is asked again
+        self.reminder_refresh = None
+        # Writes waiting for the next group commit, and the undo/redo history
+        self.journal = Journal(config.UNDO_LIMIT)
+        self.commit_after = None
+        # write_batch calls not yet finished; closing the window waits for them
+        self.commits = []
+        # Undos and redos asked for while writes were still queued (run after them)
+        self.journal_waiting = []
+        self.worker = DBWorker(self, on_busy=self._show_busy)
 
         self._layout()
         self.load_tasks()
+        if self.sync:
+            self._poll_sync()
+        if verify_session:
+            self.verify_session()
+
+        # Hidden latency/counter panel
+        self.debug_panel = None
+        self.bind_all("<Control-Shift-D>", lambda e: self.toggle_debug_panel())
+        # On the main window only, so they do not fire inside the task dialogs
+        self.bind("<Control-z>", lambda e: self.undo())
+        self.bind("<Control-y>", lambda e: self.redo())
+        self.bind("<Control-Shift-Z>", lambda e: self.redo())
+        self.bind("<Control-s>", lambda e: self.commit())
 
     # ========== LAYOUT ==========
     def _layout(self):
@@ -83,6 +153,8 @@ class TaskManagerGUI(tk.Tk):
 
         self.cat_frame = tk.Frame(self.sidebar, bg=SIDEBAR)
         self.cat_frame.pack(fill=tk.X, padx=10)
+        # category -> (button, label); reused across redraws
+        self.cat_buttons = {}
 
     # ========== MAIN ==========
     def _main_header(self):
@@ -106,6 +178,23 @@ class TaskManagerGUI(tk.Tk):
             command=self.add_task
         ).pack(side=tk.RIGHT)
 
+        tk.Button(
+            h,
+            text="⟳ Refresh",
+            bg=CARD,
+            fg=TEXT,
+            relief=tk.FLAT,
+            command=self.load_tasks
+        ).pack(side=tk.RIGHT, padx=10)
+
+        # In-flight indicator for background DB work
+        self.busy_lbl = tk.Label(h, text="", fg=ACCENT, bg=BG)
+        self.busy_lbl.pack(side=tk.RIGHT, padx=10)
+
+        # Local cache sync state (empty when talking to the server directly)
+        self.sync_lbl = tk.Label(h, text="", fg=TEXT, bg=BG)
+        self.sync_lbl.pack(side=tk.RIGHT, padx=10)
+
     def _dashboard(self):
         d = tk.Frame(self.main, bg=BG)
         d.pack(fill=tk.X, padx=20)
@@ -154,6 +243,8 @@ class TaskManagerGUI(tk.Tk):
 
         cols = ("ID", "Title", "Description", "Due", "Priority", "Category", "Status")
         self.tree = ttk.Treeview(f, columns=cols, show="headings")
+        # Click a heading to sort by it, Shift+click to add it as a further key
+        self.tree.bind("<ButtonRelease-1>", self._on_heading_click)
 
         style = ttk.Style(self)
         style.theme_use("default")
@@ -162,7 +253,7 @@ class TaskManagerGUI(tk.Tk):
             background=CARD,
             foreground=TEXT,
             fieldbackground=CARD,
-            rowheight=25
+            rowheight=ROW_HEIGHT
         )
         style.map("Treeview", background=[("selected", ACCENT)])
 
@@ -188,6 +279,15 @@ class TaskManagerGUI(tk.Tk):
         scroll_x = tk.Scrollbar(f, orient="horizontal", command=self.tree.xview)
         self.tree.configure(xscrollcommand=scroll_x.set)
 
+        if config.VIRTUAL_TABLE:
+            # Rows are paged in by the table itself, not scrolled by the Treeview
+            scroll_y = tk.Scrollbar(f, orient="vertical")
+            scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+            self.table = VirtualTaskTable(self.tree, self._row_values, scroll_y, ROW_HEIGHT)
+        else:
+            self.table = TaskTable(self.tree, self._row_values)
+        self.table.on_near_end = self.load_more
+
         self.tree.pack(fill=tk.BOTH, expand=True)
         scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
 
@@ -195,34 +295,234 @@ class TaskManagerGUI(tk.Tk):
         btns.pack(pady=10)
 
         tk.Button(btns, text="Edit", command=self.edit_task).pack(side=tk.LEFT, padx=5)
+        tk.Button(btns, text="Complete", command=self.complete_tasks).pack(side=tk.LEFT, padx=5)
+        tk.Button(btns, text="Change…", command=self.change_tasks).pack(side=tk.LEFT, padx=5)
         tk.Button(btns, text="Delete", command=self.delete_task).pack(side=tk.LEFT, padx=5)
+        tk.Button(btns, text="↶ Undo", command=self.undo).pack(side=tk.LEFT, padx=(20, 5))
+        tk.Button(btns, text="↷ Redo", command=self.redo).pack(side=tk.LEFT, padx=5)
 
     # ========== CORE LOGIC ==========
     def load_tasks(self):
-        self.tasks = self.db.get_tasks(self.user_email)
-        self.refresh_table(self.tasks)
-
-        total = len(self.tasks)
-        done = sum(1 for t in self.tasks if t["STATUS"] == "Completed")
+        """
+        Full reload from the database. CRUD actions apply deltas instead;
+        this is the fallback (and the Refresh button). A newer reload
+        supersedes one still in flight. With paging on, only the first page
+        is fetched; load_more/load_rest bring in the others. Counters and
+        sidebar are drawn from TaskDB.get_counts, which is queued first.
+        """
+        self.load_started = time.perf_counter()
+        self.descriptions.clear()
+        self.worker.submit(
+            self.db.get_counts, self.user_email,
+            on_done=self._counts_loaded,
+            on_error=self._db_error,
+            key="counts"
+        )
+        if config.PAGE_SIZE:
+            self.worker.submit(
+                self.db.get_tasks_page, self.user_email, config.PAGE_SIZE,
+                on_done=self._first_page_loaded,
+                on_error=self._db_error,
+                key="reload"
+            )
+        else:
+            self.worker.submit(
+                self.db.get_tasks, self.user_email,
+                on_done=self._tasks_loaded,
+                on_error=self._db_error,
+                key="reload"
+            )
+        self.load_reminders()
 
-        self.total_lbl.config(text=total)
-        self.done_lbl.config(text=done)
-        self.pending_lbl.config(text=total - done)
+    def _first_page_loaded(self, page):
+        tasks, self.page_cursor = page
+        self.page_request = None
+        self._tasks_loaded(tasks)
 
+    def _counts_loaded(self, counts):
+        self.counts = TaskCounts(counts)
+        self.update_counters()
         self.show_categories()
 
-    def refresh_table(self, data):
-        self.tree.delete(*self.tree.get_children())
-        for t in data:
-            self.tree.insert("", "end", values=(
-                t["ID"],
-                t["TITLE"],
-                t.get("DESCRIPTION", ""),
-                t["DUE_DATE"],
-                t["PRIORITY"],
-                t["CATEGORY"],
-                t["STATUS"]
-            ))
+    @timed("gui.load_tasks")
+    def _tasks_loaded(self, tasks):
+        self.store.load(tasks)
+        self.search_results = None
+
+        self.filter_search()
+        # Click-to-screen time, including the DB round trip and worker hand-off
+        METRICS.observe("gui.load_tasks.total", (time.perf_counter() - self.load_started) * 1000)
+
+    def update_counters(self):
+        total = self.counts.total()
+        done = self.counts.status_count("Completed")
+
+        self.total_lbl.config(text=str(total))
+        self.done_lbl.config(text=str(done))
+        self.pending_lbl.config(text=str(total - done))
+
+    # ========== PAGING ==========
+    def load_more(self):
+        """
+        Fetches the next page when the table is scrolled near its end.
+        """
+        if self.page_cursor is None or self.page_request is not None:
+            return
+        cursor = self.page_request = self.page_cursor
+        self.worker.submit(
+            self.db.get_tasks_page, self.user_email, config.PAGE_SIZE, cursor,
+            on_done=lambda page: self._page_loaded(cursor, page),
+            on_error=self._page_failed,
+            key="page"
+        )
+
+    def load_rest(self):
+        """
+        Fetches every remaining page; filters, search and column sorting
+        need the full list.
+        """
+        if self.page_cursor is None or self.page_request == "rest":
+            return
+        # Supersedes a load_more still in flight (same worker key)
+        self.page_request = "rest"
+        cursor = self.page_cursor
+        self.worker.submit(
+            self._fetch_rest, cursor,
+            on_done=lambda page: self._page_loaded(cursor, page),
+            on_error=self._page_failed,
+            key="page"
+        )
+
+    def _fetch_rest(self, cursor):
+        # Runs on the DB worker thread
+        tasks = []
+        while cursor is not None:
+            page, cursor = self.db.get_tasks_page(self.user_email, config.PAGE_SIZE, cursor)
+            tasks.extend(page)
+        return tasks, None
+
+    def _page_loaded(self, requested, page):
+        if requested != self.page_cursor:
+            return  # a reload started over since this page was requested
+        tasks, self.page_cursor = page
+        self.page_request = None
+        # Rows edited locally since the first page are already up to date
+        tasks = [t for t in tasks if self.store.get(t["ID"]) is None]
+        self.store.extend(tasks)
+        for t in tasks:
+            self.reminders.schedule(t)
+        if self.current_category or self.sort_order:
+            # New rows land all over a sorted or filtered table: redraw it once
+            if tasks:
+                self._redraw()
+        else:
+            for t in tasks:
+                if self._in_view(t):
+                    self._show_row(t)
+
+    def _page_failed(self, error):
+        self.page_request = None
+        self._db_error(error)
+
+    @timed("gui.refresh_table")
+    def refresh_table(self, data, top=False):
+        """
+        Shows data in the current sort order; top for a new view (reload,
+        filter, sort or search), which starts at the first row.
+        """
+        if self.sort_order:
+            data = self.sort_order.sort(data)
+        self.table.set_rows(data, top)
+
+    def _row_values(self, t):
+        due = t["DUE_DATE"]
+        if t.get("RECURRENCE"):
+            # The open occurrence, marked as repeating
+            due = f"↻ {t['NEXT_DUE']}"
+        return (
+            t["ID"],
+            t["TITLE"],
+            t.get("DESCRIPTION", ""),
+            due,
+            t["PRIORITY"],
+            t["CATEGORY"],
+            t["STATUS"]
+        )
+
+    # ========== DELTAS ==========
+    def _in_view(self, t):
+        # Search results are ranked by the database; _after_delta re-runs the search
+        if self.search_var.get().strip():
+            return False
+        return self.store.matches(t, self.current_category)
+
+    def _apply_added(self, t, show=True):
+        self.store.add(t)
+        self.reminders.schedule(t)
+        if show and self._in_view(t):
+            self._show_row(t)
+
+    def _apply_updated(self, t, show=True):
+        """
+        With show=False the table is left alone; bulk changes redraw it once
+        afterwards (_redraw) instead of moving rows one at a time.
+        """
+        old = self.store.update(t)
+        self.reminders.schedule(t)
+        if old is not None and show and self._in_view(old):
+            self._hide_row(old)
+        if show and self._in_view(t):
+            self._show_row(t)
+
+    def _apply_deleted(self, task_id, show=True):
+        old = self.store.remove(task_id)
+        self.reminders.cancel(task_id)
+        self.sort_order.forget(task_id)
+        if old is not None and show and self._in_view(old):
+            self._hide_row(old)
+
+    def _redraw(self):
+        # Search results are redrawn by _after_delta's new search
+        if not self.search_var.get().strip():
+            self.refresh_table(self._view_rows())
+
+    def _view_rows(self):
+        # Loaded tasks in the selected category, before sorting
+        return self.store.query(self.current_category)
+
+    def _row_key(self):
+        # The order table.rows is kept in
+        return self.sort_order.key if self.sort_order else task_sort_key
+
+    def _show_row(self, t):
+        key = self._row_key()
+        self.table.insert(bisect.bisect(self.table.rows, key(t), key=key), t)
+
+    def _hide_row(self, t):
+        key = self._row_key()
+        self.table.delete(bisect.bisect_left(self.table.rows, key(t), key=key))
+
+    def _db_error(self, error):
+        messagebox.showerror("Database Error", str(error))
+
+    def _show_busy(self, pending):
+        self.busy_lbl.config(text="⏳ Working…" if pending else "")
+        self.config(cursor="watch" if pending else "")
+
+    def _after_delta(self, result):
+        """
+        Redraws counters and sidebar after a delta; a None result means the
+        row changed underneath us, so fall back to a full reload.
+        """
+        if result is None:
+            self.load_tasks()
+            return
+        self.update_counters()
+        self.show_categories()
+        self._arm_reminders()
+        if self.search_var.get().strip():
+            self.search_results = None
+            self.filter_search(top=False)
 
     # ========== TASK CRUD ==========
     def add_task(self):
@@ -230,83 +530,450 @@ class TaskManagerGUI(tk.Tk):
         # Wait for dialog to close
         self.wait_window(d)
         if d.result:
-            self.db.add_task(d.result, self.user_email)
-            messagebox.showinfo(
-                "Task Added",
-                f"Task '{d.result['title']}' added to category '{d.result['category']}'"
-            )
-            self.load_tasks()
-            # If a category is selected, keep the filter applied
-            if self.current_category:
-                self.filter_category(self.current_category)
+            self._write({"op": "add", "task": d.result}, on_done=self._task_added)
+
+    def _task_added(self, changes):
+        _, task = changes[0]
+        messagebox.showinfo(
+            "Task Added",
+            f"Task '{task['TITLE']}' added to category '{task['CATEGORY']}'"
+        )
 
     def edit_task(self):
-        sel = self.tree.focus()
-        if not sel:
+        tid = self.table.selected_id()
+        if tid is None:
+            return
+
+        task = self.store.get(tid)
+        if task is None:
+            return  # deleted since it was selected
+        if not task.get("DESCRIPTION_TRUNCATED"):
+            self._open_editor(task)
+            return
+
+        description = self.descriptions.get(tid)
+        if description is not None:
+            self._open_editor(dict(task, DESCRIPTION=description))
             return
+        self.worker.submit(
+            self.db.get_description, tid, self.user_email,
+            on_done=lambda text: self._description_loaded(task, text),
+            on_error=self._db_error,
+            key="description"
+        )
 
-        tid = self.tree.item(sel)["values"][0]
-        task = next(t for t in self.tasks if t["ID"] == tid)
+    def _description_loaded(self, task, description):
+        if description is None:
+            self.load_tasks()  # deleted elsewhere
+            return
+        self.descriptions.put(task["ID"], description)
+        self._open_editor(dict(task, DESCRIPTION=description))
 
+    def _open_editor(self, task):
         d = TaskDialog(self, "Edit Task", task)
         self.wait_window(d)
         if d.result:
-            self.db.update_task(tid, d.result, self.user_email)
-            self.load_tasks()
-            if self.current_category:
-                self.filter_category(self.current_category)
+            self._write({"op": "update", "id": task["ID"], "task": d.result})
 
     def delete_task(self):
-        sel = self.tree.focus()
-        if not sel:
+        ids = self.table.selected_ids()
+        if not ids:
             return
 
-        tid = self.tree.item(sel)["values"][0]
-        if messagebox.askyesno("Delete", "Delete this task?"):
-            self.db.delete_task(tid, self.user_email)
-            self.load_tasks()
-            if self.current_category:
-                self.filter_category(self.current_category)
+        question = "Delete this task?" if len(ids) == 1 else f"Delete {len(ids)} tasks?"
+        if messagebox.askyesno("Delete", question):
+            self._write({"op": "delete", "ids": ids})
 
-    # ========== CATEGORY ==========
-    def show_categories(self):
-        for w in self.cat_frame.winfo_children():
-            w.destroy()
+    # ========== BULK ==========
+    def complete_tasks(self):
+        self._update_selected({"status": "Completed"})
 
-        categories = sorted(
-            set(t["CATEGORY"] for t in self.tasks if t["CATEGORY"])
+    def change_tasks(self):
+        ids = self.table.selected_ids()
+        if not ids:
+            return
+        d = BulkEditDialog(self, len(ids))
+        self.wait_window(d)
+        if d.result:
+            self._update_selected(d.result)
+
+    def _update_selected(self, changes):
+        """
+        One set-based update (see TaskDB.update_tasks) for all selected rows.
+        """
+        ids = self.table.selected_ids()
+        if ids:
+            self._write({"op": "update_many", "ids": ids, "changes": changes})
+
+    # ========== JOURNAL ==========
+    def _write(self, op, on_done=None):
+        """
+        Queues a write (an op of TaskDB.write_batch) for the next group
+        commit. Writes made less than GROUP_COMMIT_MS apart share one
+        transaction, held back at most GROUP_COMMIT_MAX_MS. on_done gets the
+        write's (before, after) pairs once it is committed and shown.
+        """
+        self.journal.queue([op], on_done)
+        self._schedule_commit()
+
+    def _schedule_commit(self):
+        if self.commit_after:
+            self.after_cancel(self.commit_after)
+        waited = (time.monotonic() - self.journal.since) * 1000
+        delay = max(0, min(config.GROUP_COMMIT_MS, config.GROUP_COMMIT_MAX_MS - waited))
+        self.commit_after = self.after(int(delay), self.commit)
+
+    def commit(self):
+        """
+        Sends every queued write in one TaskDB.write_batch. Runs when writes
+        pause, on Ctrl+S, before undo/redo and when the window closes.
+        """
+        if self.commit_after:
+            self.after_cancel(self.commit_after)
+            self.commit_after = None
+        actions = self.journal.take()
+        if not actions:
+            return
+        self.commits.append(self.worker.submit(
+            self.db.write_batch, Journal.ops(actions), self.user_email,
+            on_done=lambda results: self._committed(actions, results),
+            on_error=lambda error: self._commit_failed(actions, error)
+        ))
+
+    def _committed(self, actions, results):
+        self.commits = [f for f in self.commits if not f.done()]
+        done = self.journal.committed(actions, results)
+        changes = [pair for _, pairs, _ in done for pair in pairs]
+        # One row moves in place; more are redrawn once
+        show = len(changes) == 1
+        for before, after in changes:
+            self._apply_change(before, after, show)
+        if not show:
+            self._redraw()
+        # Rows missing (changed elsewhere) or renumbered by sync: reload
+        self._after_delta(results if all(complete for _, _, complete in done) else None)
+        for on_done, pairs, _ in done:
+            if on_done and pairs:
+                on_done(pairs)
+        self._run_waiting()
+
+    def _commit_failed(self, actions, error):
+        self.commits = [f for f in self.commits if not f.done()]
+        self.journal.failed(actions)
+        self._db_error(error)
+        self._run_waiting()
+
+    def _apply_change(self, before, after, show):
+        self.descriptions.pop((after or before)["ID"])
+        # Counts cover every task, loaded or not: adjust them from the
+        # database's before/after rows rather than from the store
+        if before is not None:
+            self.counts.remove(before)
+        if after is not None:
+            self.counts.add(after)
+        if after is None:
+            self._apply_deleted(before["ID"], show)
+        elif before is None:
+            self._apply_added(after, show)
+        else:
+            self._apply_updated(after, show)
+
+    def undo(self):
+        self._replay(self.journal.undo)
+
+    def redo(self):
+        self._replay(self.journal.redo)
+
+    def _replay(self, step):
+        # History only covers committed writes; queued ones go first
+        if self.journal.busy():
+            self.journal_waiting.append(step)
+            self.commit()
+        elif step():
+            self.commit()
+
+    def _run_waiting(self):
+        if self.journal_waiting and not self.journal.busy():
+            self._replay(self.journal_waiting.pop(0))
+
+    # ========== SYNC ==========
+    def _poll_sync(self):
+        """
+        Shows the sync state, renumbers tasks that got their server ids and
+        reloads from the replica when the sync engine changed rows (edits
+        made elsewhere).
+        """
+        pending = self.db.pending
+        if self.sync.online is False:
+            text = f"⚠ Offline ({pending} unsynced)" if pending else "⚠ Offline"
+        elif pending:
+            text = f"↻ Syncing {pending}…"
+        else:
+            text = "✓ Synced" if self.sync.online else ""
+        self.sync_lbl.config(text=text)
+
+        renumbered = self.db.take_renumbered()
+        for old_id, new_id in renumbered:
+            self._renumber(old_id, new_id)
+        if renumbered and self.search_results and self.search_var.get().strip():
+            self._show_search_results()
+        if self.sync.generation != self.sync_generation:
+            self.sync_generation = self.sync.generation
+            self.load_tasks()
+        self._sync_polling = self.after(1000, self._poll_sync)
+
+    def _renumber(self, old_id, new_id):
+        """
+        Moves a task created here from its temporary id to the server's,
+        keeping its place in the view, its selection and its history.
+        """
+        self.journal.renamed[old_id] = new_id
+        self.descriptions.pop(old_id)
+        if self.search_results:
+            text, ids = self.search_results
+            self.search_results = (text, [new_id if i == old_id else i for i in ids])
+        old = self.store.get(old_id)
+        if old is None:
+            return
+        t = Task.from_dict(dict(old, ID=new_id))
+        show = self._in_view(old)
+        self.table.rename(old_id, new_id)
+        self._apply_deleted(old_id, show)
+        self._apply_added(t, show)
+
+    # ========== REMINDERS ==========
+    def load_reminders(self):
+        """
+        Fetches the open tasks due within REMINDER_LOOKAHEAD_DAYS (an index
+        range scan); deltas keep the queue current after that.
+        """
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        until = today + timedelta(days=config.REMINDER_LOOKAHEAD_DAYS)
+        self.worker.submit(
+            self.db.get_due, self.user_email, until,
+            on_done=lambda tasks: self._reminders_loaded(until + timedelta(days=1), tasks),
+            on_error=lambda _: None,  # reminders wait for the next reload
+            key="reminders"
         )
 
-        for c in categories:
-            count = sum(1 for t in self.tasks if t["CATEGORY"] == c)
-            tk.Button(
-                self.cat_frame,
-                text=f"{c} ({count})",
-                bg=CARD,
-                fg=TEXT,
-                relief=tk.FLAT,
-                command=lambda x=c: self.filter_category(x)
-            ).pack(fill=tk.X, pady=3)
+    def _reminders_loaded(self, refresh, tasks):
+        self.reminders.load(tasks)
+        self.reminder_refresh = refresh
+        self._arm_reminders()
+
+    def _arm_reminders(self):
+        """
+        Keeps the single timer pointed at the earliest reminder (or the end
+        of the lookahead window); re-armed only when that moment changes.
+        """
+        times = [w for w in (self.reminders.next_time(), self.reminder_refresh) if w]
+        target = min(times) if times else None
+        if target == self.reminder_armed:
+            return
+        if self.reminder_after:
+            self.after_cancel(self.reminder_after)
+            self.reminder_after = None
+        self.reminder_armed = target
+        if target is None:
+            return
+        wait = (target - datetime.now()).total_seconds() * 1000
+        self.reminder_after = self.after(
+            int(min(max(wait, 0), REMINDER_MAX_WAIT_MS)), self._fire_reminders
+        )
+
+    def _fire_reminders(self):
+        self.reminder_after = None
+        self.reminder_armed = None
+        now = datetime.now()
+        if self.reminder_refresh and now >= self.reminder_refresh:
+            self.reminder_refresh = None
+            self.load_reminders()
+        due = self.reminders.pop_due(now)
+        # Armed first: the message box below runs a nested event loop
+        self._arm_reminders()
+        if due:
+            self._show_reminders(due)
+
+    def _show_reminders(self, due):
+        lines = [f"• {t['TITLE']} (due {t['NEXT_DUE']})" for t in due[:10]]
+        if len(due) > 10:
+            lines.append(f"…and {len(due) - 10} more")
+        self.bell()
+        messagebox.showinfo("Reminder", "\n".join(lines))
+
+    # ========== CATEGORY ==========
+    @timed("gui.show_categories")
+    def show_categories(self):
+        """
+        Updates the category buttons in place: labels are only rewritten when
+        a count changed, and buttons only created or destroyed when a
+        category appears or disappears.
+        """
+        counts = self.counts.category_counts()
+        for c in [c for c in self.cat_buttons if c not in counts]:
+            self.cat_buttons.pop(c)[0].destroy()
+
+        following = None
+        for c in sorted(counts, reverse=True):
+            text = f"{c} ({counts[c]})"
+            if c not in self.cat_buttons:
+                button = tk.Button(
+                    self.cat_frame,
+                    text=text,
+                    bg=CARD,
+                    fg=TEXT,
+                    relief=tk.FLAT,
+                    command=lambda x=c: self.filter_category(x)
+                )
+                # Keep alphabetical order: go in before the next category's button
+                if following is None:
+                    button.pack(fill=tk.X, pady=3)
+                else:
+                    button.pack(fill=tk.X, pady=3, before=following)
+            else:
+                button, shown = self.cat_buttons[c]
+                if shown != text:
+                    button.config(text=text)
+            self.cat_buttons[c] = (button, text)
+            following = button
 
     def filter_category(self, cat):
         self.current_category = cat
-        filtered = [t for t in self.tasks if t["CATEGORY"] == cat]
-        self.refresh_table(filtered)
+        self.filter_search()
+
+    # ========== SORTING ==========
+    def _on_heading_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != "heading":
+            return
+        column = self.tree.column(self.tree.identify_column(event.x), "id")
+        # Bit 0 of the event state is Shift
+        self.sort_order.click(column, add=bool(event.state & 0x1))
+        self._show_sort_headings()
+        self.filter_search()
+
+    def _show_sort_headings(self):
+        keys = {c: (i, d) for i, (c, d) in enumerate(self.sort_order.columns, start=1)}
+        for c in self.tree["columns"]:
+            text = c
+            if c in keys:
+                i, descending = keys[c]
+                text += " ▼" if descending else " ▲"
+                if len(keys) > 1:
+                    text += str(i)
+            self.tree.heading(c, text=text)
 
     # ========== SEARCH ==========
-    def filter_search(self):
-        q = self.search_var.get().lower()
-        base = self.tasks
-        if self.current_category:
-            base = [t for t in self.tasks if t["CATEGORY"] == self.current_category]
-        self.refresh_table([t for t in base if q in t["TITLE"].lower()])
+    def filter_search(self, top=True):
+        """
+        The category filter runs on the loaded tasks. Search text goes to
+        TaskDB.search (full text, ranked), once typing pauses. top=False
+        re-shows the same view after edits without scrolling it.
+        """
+        if self.search_after:
+            self.after_cancel(self.search_after)
+            self.search_after = None
+
+        text = self.search_var.get().strip()
+        if not text:
+            self.search_results = None
+            if self.current_category or self.sort_order:
+                self.load_rest()
+            self.refresh_table(self._view_rows(), top)
+        elif self.search_results and self.search_results[0] == text:
+            self._show_search_results(top)
+        else:
+            self.search_after = self.after(SEARCH_DELAY_MS, lambda: self._run_search(text, top))
+
+    def _run_search(self, text, top=True):
+        self.search_after = None
+        self.worker.submit(
+            self.db.search, self.user_email, text, config.SEARCH_LIMIT,
+            on_done=lambda tasks: self._search_loaded(text, tasks, top),
+            on_error=self._db_error,
+            key="search"
+        )
+
+    def _search_loaded(self, text, tasks, top=True):
+        if text != self.search_var.get().strip():
+            return  # typed on since
+        for t in tasks:
+            # Hits from pages not loaded yet; load_more skips rows already present
+            if self.store.get(t["ID"]) is None:
+                self.store.add(t)
+        self.search_results = (text, [t["ID"] for t in tasks])
+        self._show_search_results(top)
+
+    def _show_search_results(self, top=False):
+        rows = (self.store.get(tid) for tid in self.search_results[1])
+        self.refresh_table([
+            t for t in rows
+            if t is not None and self.store.matches(t, self.current_category)
+        ], top)
+
+    # ========== DEBUG ==========
+    def toggle_debug_panel(self):
+        if self.debug_panel and self.debug_panel.winfo_exists():
+            self.debug_panel.destroy()
+            self.debug_panel = None
+        else:
+            self.debug_panel = DebugPanel(self)
 
     # ========== LOGOUT ==========
+    def destroy(self):
+        # Queued writes are committed, not dropped, before the worker stops
+        self.commit()
+        wait(self.commits)
+        self.worker.shutdown()
+        if self.reminder_after:
+            self.after_cancel(self.reminder_after)
+        if self.sync:
+            self.after_cancel(self._sync_polling)
+            self.db.close()
+        METRICS.dump()
+        super().destroy()
+
     def logout(self):
+        # Ahead of the revoke below, while the session is still valid
+        self.commit()
+        clear_local_session()
+        if self.session_token:
+            # Revoke server-side before the worker shuts down with the window;
+            # the auth DB (a connection pool, or the service client) is built there too
+            token = self.session_token
+            self.worker.submit(
+                lambda: open_auth_db().revoke_session(token),
+                on_done=lambda _: self._show_login(),
+                on_error=lambda _: self._show_login()
+            )
+        else:
+            self._show_login()
+
+    def _show_login(self):
         self.destroy()
         from auth_gui import AuthWindow
         AuthWindow().mainloop()
 
+    # ========== SESSION ==========
+    def verify_session(self):
+        """
+        The dashboard was opened from the locally cached token; confirm it
+        with the server without holding up the first paint.
+        """
+        token = self.session_token
+        self.worker.submit(
+            lambda: open_auth_db().validate_session(token),
+            on_done=self._session_checked,
+            on_error=lambda _: None  # offline: keep trusting the local token
+        )
+
+    def _session_checked(self, email):
+        if email == self.user_email:
+            return
+        clear_local_session()
+        self.session_token = None
+        messagebox.showinfo("Session Expired", "Please log in again.")
+        self._show_login()
+
 
 # ========== RUN ==========
 if __name__ == "__main__":
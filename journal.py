@@ -0,0 +1,167 @@
+import time
+
+from db import task_input
+
+
+class Journal:
+    """
+    Writes waiting for the next group commit, and the undo/redo history of
+    those already committed.
+
+    A user action queues ops in TaskDB.write_batch's shape; take() hands
+    every queued action to one write_batch call. Its results come back as
+    (before, after) task states per row, one list per action. Those lists
+    are the history: undoing one writes its before states back. Undo and
+    redo go through the same queue, and their own results become the entry
+    on the opposite stack, so redoing is undoing an undo.
+
+    A deleted task comes back under a new id; `renamed` maps the old id to
+    it, so older entries still find the row.
+    """
+
+    def __init__(self, limit=100):
+        self.limit = limit
+        # (ops, restores, on_done, history, entry) per queued action. restores
+        # is parallel to ops: the id an "add" brings back, else None. history
+        # is "do", "undo" or "redo"; entry is the one being undone or redone
+        self.queued = []
+        # When the oldest queued action was queued (time.monotonic)
+        self.since = None
+        # Batches taken but not yet committed or failed
+        self.in_flight = 0
+        self.undo_stack = []
+        self.redo_stack = []
+        self.renamed = {}
+
+    def __len__(self):
+        return len(self.queued)
+
+    def busy(self):
+        """
+        Whether writes are queued or being committed; undo and redo wait for them.
+        """
+        return bool(self.queued) or self.in_flight > 0
+
+    def current_id(self, task_id):
+        while task_id in self.renamed:
+            task_id = self.renamed[task_id]
+        return task_id
+
+    # ---------- QUEUE ----------
+    def queue(self, ops, on_done=None, history="do", entry=None, restores=None):
+        if not self.queued:
+            self.since = time.monotonic()
+        self.queued.append((ops, restores or [None] * len(ops), on_done, history, entry))
+
+    def take(self):
+        """
+        Empties the queue; returns its actions, whose ops (see ops()) are
+        then committed together.
+        """
+        actions, self.queued, self.since = self.queued, [], None
+        if actions:
+            self.in_flight += 1
+        return actions
+
+    @staticmethod
+    def ops(actions):
+        return [op for action in actions for op in action[0]]
+
+    def committed(self, actions, results):
+        """
+        Records the write_batch results (one per op, in order) of a take().
+        Returns (on_done, changes, complete) per action, changes being its
+        (before, after) pairs. complete is False when rows it named were
+        missing or renumbered, i.e. changed elsewhere.
+        """
+        self.in_flight -= 1
+        results = iter(results)
+        done = []
+        for ops, restores, on_done, history, _ in actions:
+            changes, complete = [], True
+            for op, restore in zip(ops, restores):
+                result = next(results)
+                changes.extend(_pairs(result))
+                complete = complete and _complete(op, result)
+                if restore is not None and result["after"]:
+                    self.renamed[restore] = result["after"][0]["ID"]
+            if changes:
+                self._record(changes, history)
+            done.append((on_done, changes, complete))
+        return done
+
+    def failed(self, actions):
+        """
+        A take() batch was rolled back; entries it was undoing or redoing
+        go back on their stacks.
+        """
+        self.in_flight -= 1
+        for _, _, _, history, entry in actions:
+            if history == "undo":
+                self.undo_stack.append(entry)
+            elif history == "redo":
+                self.redo_stack.append(entry)
+
+    # ---------- HISTORY ----------
+    def undo(self):
+        """
+        Queues the inverse of the latest change; False if there is none.
+        """
+        return self._step(self.undo_stack, "undo")
+
+    def redo(self):
+        return self._step(self.redo_stack, "redo")
+
+    def _step(self, stack, history):
+        if not stack:
+            return False
+        entry = stack.pop()
+        ops, restores = self._restore_ops(entry)
+        self.queue(ops, history=history, entry=entry, restores=restores)
+        return True
+
+    def _restore_ops(self, changes):
+        """
+        Ops writing back the before state of each (before, after) pair.
+        """
+        ops, restores, deletes = [], [], []
+        for want, have in changes:
+            if have is None:
+                ops.append({"op": "add", "task": task_input(want)})
+                restores.append(want["ID"])
+            elif want is None:
+                deletes.append(self.current_id(have["ID"]))
+            else:
+                ops.append({"op": "restore", "id": self.current_id(have["ID"]),
+                            "task": task_input(want)})
+                restores.append(None)
+        if deletes:
+            ops.append({"op": "delete", "ids": deletes})
+            restores.append(None)
+        return ops, restores
+
+    def _record(self, changes, history):
+        if history == "undo":
+            self.redo_stack.append(changes)
+            return
+        if history == "do":
+            self.redo_stack.clear()
+        self.undo_stack.append(changes)
+        del self.undo_stack[:-self.limit]
+
+
+def _pairs(result):
+    """
+    (before, after) per row of a write_batch result; None for a side the
+    row is missing from.
+    """
+    after = {t["ID"]: t for t in result["after"]}
+    pairs = [(t, after.pop(t["ID"], None)) for t in result["before"]]
+    return pairs + [(None, t) for t in after.values()]
+
+
+def _complete(op, result):
+    if op["op"] == "add":
+        return True
+    ids = set(op["ids"]) if "ids" in op else {op["id"]}
+    return {t["ID"] for t in result["before"]} == ids
@@ -0,0 +1,146 @@
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+import config
+
+# Histogram bucket upper bounds, in milliseconds
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf")]
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS_MS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket holding the p-th percentile (max for the last bucket).
+        """
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max,
+            "buckets": {str(b): n for b, n in zip(BUCKETS_MS, self.counts) if n},
+        }
+
+
+class Metrics:
+    """
+    Process-wide counters and latency histograms (milliseconds).
+    Thread-safe: DB calls record from the worker thread, the GUI from Tk's.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, ms):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(ms)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {k: h.snapshot() for k, h in self.histograms.items()},
+            }
+
+    def dump(self, path=None):
+        """
+        Appends a timestamped snapshot as one JSON line to path (default config.METRICS_LOG).
+        """
+        path = path or config.METRICS_LOG
+        if not path:
+            return
+        record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **self.snapshot()}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def report(self):
+        """
+        Human-readable table for the debug panel.
+        """
+        snap = self.snapshot()
+        lines = [f"{'timer':<34}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}  (ms)"]
+        for name in sorted(snap["histograms"]):
+            h = snap["histograms"][name]
+            lines.append(
+                f"{name:<34}{h['count']:>7}{h['mean']:>9.1f}{h['p50']:>9.1f}"
+                f"{h['p95']:>9.1f}{h['max']:>9.1f}"
+            )
+        lines.append("")
+        lines.append(f"{'counter':<34}{'value':>12}")
+        for name in sorted(snap["counters"]):
+            lines.append(f"{name:<34}{snap['counters'][name]:>12,}")
+        return "\n".join(lines)
+
+
+METRICS = Metrics()
+
+
+def timed(name):
+    """
+    Decorator: records each call's wall time under name, plus name.calls and name.errors.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                METRICS.incr(f"{name}.errors")
+                raise
+            finally:
+                METRICS.observe(name, (time.perf_counter() - start) * 1000)
+                METRICS.incr(f"{name}.calls")
+        return wrapper
+    return decorate
@@ -0,0 +1,172 @@
+import threading
+import time
+
+# ================= MIGRATIONS =================
+# Numbered schema changes, applied in order and recorded in schema_version.
+# Append new ones at the end; never renumber or edit a released migration.
+
+
+def _create_tasks(backend, conn):
+    backend.create_table(conn, backend.TASKS_DDL)
+
+    # Tables created by older builds may be missing columns
+    for column_sql in (
+        "user_email VARCHAR2(200) NOT NULL",
+        "title VARCHAR2(200) NOT NULL",
+        "description CLOB",
+        "due_date DATE",
+        "priority VARCHAR2(20)",
+        "category VARCHAR2(50)",
+        "status VARCHAR2(20)",
+    ):
+        backend.add_column(conn, "tasks", column_sql)
+
+
+def _create_users(backend, conn):
+    backend.create_table(conn, backend.USERS_DDL)
+
+
+def _add_priority_rank(backend, conn):
+    backend.add_column(conn, "tasks", "priority_rank NUMBER(1) DEFAULT 0 NOT NULL")
+
+    # Rows written before priority_rank existed default to 0; give them their real rank
+    cur = conn.cursor()
+    cur.execute("""
+    UPDATE tasks
+    SET priority_rank = CASE priority
+        WHEN 'High' THEN 3
+        WHEN 'Medium' THEN 2
+        WHEN 'Low' THEN 1
+        ELSE 0
+    END
+    WHERE priority_rank = 0 AND priority IN ('High', 'Medium', 'Low')
+    """)
+    conn.commit()
+    cur.close()
+
+    backend.create_index(conn, backend.TASKS_PAGE_INDEX_DDL)
+
+
+def _create_sessions(backend, conn):
+    backend.create_table(conn, backend.SESSIONS_DDL)
+
+
+def _add_version(backend, conn):
+    # Last-writer-wins stamp for the sync engine; 0 predates every real write
+    backend.add_column(conn, "tasks", "version NUMBER(15) DEFAULT 0 NOT NULL")
+    backend.create_index(conn, backend.TASKS_VERSION_INDEX_DDL)
+
+
+def _add_counts_index(backend, conn):
+    backend.create_index(conn, backend.TASKS_COUNTS_INDEX_DDL)
+
+
+def _create_search_index(backend, conn):
+    backend.create_search_index(conn)
+    conn.commit()
+
+
+def _add_recurrence(backend, conn):
+    backend.add_column(conn, "tasks", "recurrence VARCHAR2(10)")
+    backend.add_column(conn, "tasks", "next_due DATE")
+
+    # Every open task is due on its due date until it recurs
+    cur = conn.cursor()
+    cur.execute("""
+    UPDATE tasks SET next_due = due_date
+    WHERE next_due IS NULL AND (status IS NULL OR status <> 'Completed')
+    """)
+    conn.commit()
+    cur.close()
+
+    backend.create_index(conn, backend.TASKS_NEXT_DUE_INDEX_DDL)
+
+
+def _stamp_versions(backend, conn):
+    # Rows from before versioning (0) get a real stamp, so replicas that
+    # already pulled past 0 still receive them
+    cur = conn.cursor()
+    cur.execute("UPDATE tasks SET version = :v WHERE version = 0", {"v": int(time.time() * 1000)})
+    conn.commit()
+    cur.close()
+
+
+def _add_client_op(backend, conn):
+    # Outbox op id of a synced add, so a replayed push does not insert it twice
+    backend.add_column(conn, "tasks", "client_op VARCHAR2(40)")
+    backend.create_index(conn, backend.TASKS_CLIENT_OP_INDEX_DDL)
+
+
+def _create_tombstones(backend, conn):
+    # Ids and versions of deleted tasks, pulled by replicas like changed rows
+    backend.create_table(conn, backend.TOMBSTONES_DDL)
+    backend.create_index(conn, backend.TOMBSTONES_INDEX_DDL)
+
+
+MIGRATIONS = [
+    (1, "create tasks table", _create_tasks),
+    (2, "create users table", _create_users),
+    (3, "priority_rank column and paging index", _add_priority_rank),
+    (4, "create sessions table", _create_sessions),
+    (5, "version column for sync", _add_version),
+    (6, "index for per-category/status counts", _add_counts_index),
+    (7, "full-text search index", _create_search_index),
+    (8, "recurrence and next_due columns", _add_recurrence),
+    (9, "version stamp for rows written before sync", _stamp_versions),
+    (10, "client_op column for idempotent sync pushes", _add_client_op),
+    (11, "create task_tombstones table", _create_tombstones),
+]
+
+
+# ================= RUNNER =================
+
+_lock = threading.Lock()
+
+
+def current_version(backend, conn):
+    """
+    The applied schema version, in one query; 0 if schema_version does not exist yet.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT MAX(version) FROM schema_version")
+        version, = cur.fetchone()
+        return version or 0
+    except backend.DatabaseError:
+        conn.rollback()
+        return 0
+    finally:
+        cur.close()
+
+
+def migrate(pool):
+    """
+    Brings the schema up to date. Runs at most once per pool per process,
+    so later TaskDB/AuthDB constructions cost no round trip at all.
+    Returns the schema version.
+    """
+    with _lock:
+        if pool.schema_version is not None:
+            return pool.schema_version
+
+        backend = pool.backend
+        with pool.connection() as conn:
+            version = current_version(backend, conn)
+            if version == 0:
+                backend.create_table(conn, backend.SCHEMA_VERSION_DDL)
+
+            for number, description, apply in MIGRATIONS:
+                if number <= version:
+                    continue
+                apply(backend, conn)
+                cur = conn.cursor()
+                cur.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (:1, :2)",
+                    (number, description)
+                )
+                conn.commit()
+                cur.close()
+                version = number
+
+        pool.schema_version = version
+        return version
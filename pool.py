@@ -0,0 +1,215 @@
+import atexit
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+from metrics import METRICS
+from storage import get_backend
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the acquire timeout."""
+
+
+class _Pool:
+    backend = None
+    # Set by migrations.migrate once the schema is known to be current
+    schema_version = None
+
+    def acquire(self):
+        raise NotImplementedError
+
+    def release(self, conn):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a with-block and always
+        hands it back, even when the block raises.
+        """
+        with METRICS.timer("pool.acquire"):
+            conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+
+# ================= GENERIC POOL =================
+
+class ConnectionPool(_Pool):
+    """
+    Thread-safe pool for backends without a native one (SQLite).
+    Idle connections are pinged before reuse once they have been idle
+    longer than ping_interval seconds; dead ones are replaced.
+    """
+
+    def __init__(self, backend, min_size=None, max_size=None,
+                 timeout=None, ping_interval=None):
+        self.backend = backend
+        self.min_size = config.POOL_MIN if min_size is None else min_size
+        self.max_size = config.POOL_MAX if max_size is None else max_size
+        self.timeout = config.POOL_TIMEOUT if timeout is None else timeout
+        self.ping_interval = (config.POOL_PING_INTERVAL
+                              if ping_interval is None else ping_interval)
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._closed = False
+
+        for _ in range(self.min_size):
+            self._idle.put((self.backend.connect(), time.monotonic()))
+            self._size += 1
+
+    def acquire(self):
+        if self._closed:
+            raise PoolTimeout("Connection pool is closed")
+        try:
+            conn, idle_since = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._grow()
+            if conn is not None:
+                return conn
+            try:
+                conn, idle_since = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolTimeout(
+                    f"No connection available after {self.timeout}s "
+                    f"(max {self.max_size})"
+                ) from None
+
+        if time.monotonic() - idle_since >= self.ping_interval:
+            conn = self._check(conn)
+        return conn
+
+    def release(self, conn):
+        try:
+            conn.rollback()  # never hand out a half-finished transaction
+        except self.backend.DatabaseError:
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def _grow(self):
+        with self._lock:
+            if self._size >= self.max_size:
+                return None
+            self._size += 1
+        try:
+            return self.backend.connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+
+    def _check(self, conn):
+        if self.backend.ping(conn):
+            return conn
+        self._discard(conn)
+        # Same accounting as _grow: the slot is only kept if the connect succeeds
+        with self._lock:
+            self._size += 1
+        try:
+            return self.backend.connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+
+    def _discard(self, conn):
+        with self._lock:
+            self._size -= 1
+        try:
+            conn.close()
+        except self.backend.DatabaseError:
+            pass
+
+
+# ================= ORACLE POOL =================
+
+class OraclePool(_Pool):
+    """
+    Thin wrapper around oracledb.create_pool; the driver does the
+    sizing, timed waits and health checks itself.
+    """
+
+    def __init__(self, backend, min_size=None, max_size=None,
+                 timeout=None, ping_interval=None):
+        self.backend = backend
+        self._pool = backend.create_native_pool(
+            min_size=config.POOL_MIN if min_size is None else min_size,
+            max_size=config.POOL_MAX if max_size is None else max_size,
+            timeout=config.POOL_TIMEOUT if timeout is None else timeout,
+            ping_interval=(config.POOL_PING_INTERVAL
+                           if ping_interval is None else ping_interval),
+        )
+
+    def acquire(self):
+        try:
+            return self._pool.acquire()
+        except self.backend.DatabaseError as e:
+            error, = e.args
+            if error.full_code == "DPY-4005":  # timed out waiting for the pool
+                raise PoolTimeout(str(error)) from e
+            raise
+
+    def release(self, conn):
+        # The driver rolls back any open transaction on release
+        self._pool.release(conn)
+
+    def close(self):
+        self._pool.close(force=True)
+
+
+# ================= SHARED POOL =================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def create_pool(backend=None, **kwargs):
+    backend = backend or get_backend()
+    if backend.name == "oracle":
+        return OraclePool(backend, **kwargs)
+    return ConnectionPool(backend, **kwargs)
+
+
+def get_pool():
+    """
+    Returns the process-wide pool shared by TaskDB and AuthDB.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = create_pool()
+        return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(close_pool)
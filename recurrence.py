@@ -0,0 +1,84 @@
+"""
+Recurring tasks are stored once: due_date anchors the series, recurrence
+names the rule and next_due is the open occurrence. Occurrences are computed
+here on demand and never stored as rows.
+"""
+import calendar
+import heapq
+from datetime import timedelta
+from itertools import count
+
+from utils import RECURRENCE_OPTIONS, str_to_date
+
+# The rules a task can carry; "None" in the dialog is stored as NULL
+RULES = [r for r in RECURRENCE_OPTIONS if r != "None"]
+
+
+def nth_occurrence(start, rule, n):
+    """
+    The n-th occurrence (0 = start). Monthly dates are computed from the
+    anchor, not the previous occurrence, so the 31st comes back after February.
+    """
+    if rule == "Daily":
+        return start + timedelta(days=n)
+    if rule == "Weekly":
+        return start + timedelta(weeks=n)
+    if rule == "Monthly":
+        month = start.month - 1 + n
+        year = start.year + month // 12
+        month = month % 12 + 1
+        day = min(start.day, calendar.monthrange(year, month)[1])
+        return start.replace(year=year, month=month, day=day)
+    raise ValueError(f"Unknown recurrence rule: {rule!r}")
+
+
+def occurrences(start, rule, after=None):
+    """
+    Yields the occurrences of a series in order, without end; those up to
+    and including after are skipped without being generated one by one.
+    """
+    n = 0
+    if after is not None and after >= start:
+        # Jump close to after, then step past it
+        if rule == "Daily":
+            n = (after - start).days
+        elif rule == "Weekly":
+            n = (after - start).days // 7
+        elif rule == "Monthly":
+            n = (after.year - start.year) * 12 + after.month - start.month
+        n = max(0, n - 1)
+    for n in count(n):
+        when = nth_occurrence(start, rule, n)
+        if after is None or when > after:
+            yield when
+
+
+def next_occurrence(start, rule, after):
+    return next(occurrences(start, rule, after))
+
+
+def expand(tasks, start, end):
+    """
+    Yields (date, task) for every occurrence between start and end
+    (inclusive) of the given tasks, in date order; start None means from
+    each task's open occurrence. Recurring tasks are expanded lazily from
+    their next_due; others yield their next_due once.
+    """
+    def series(i, task):
+        first = str_to_date(task["NEXT_DUE"])
+        lower = first if start is None else max(first, start)
+        if task.get("RECURRENCE"):
+            dates = occurrences(str_to_date(task["DUE_DATE"]), task["RECURRENCE"],
+                                lower - timedelta(days=1))
+        else:
+            dates = iter([first])
+        for when in dates:
+            if when > end:
+                return
+            if when >= lower:
+                # i breaks ties so the tasks themselves are never compared
+                yield when, i, task
+
+    streams = [series(i, t) for i, t in enumerate(tasks) if t.get("NEXT_DUE")]
+    for when, _, task in heapq.merge(*streams):
+        yield when, task
@@ -0,0 +1,104 @@
+import heapq
+from datetime import datetime, timedelta
+from itertools import count
+
+
+class ReminderQueue:
+    """
+    Upcoming reminders in a min-heap of (when, seq, task_id). Rescheduling or
+    cancelling a task only updates `entries`; heap items that no longer match
+    it are skipped when they reach the top, and the heap is rebuilt once
+    such leftovers outnumber the live entries.
+    """
+
+    def __init__(self, hour=9):
+        # Reminders go off at this hour of the due day
+        self.hour = hour
+        self.heap = []
+        # task_id -> (when, task) of its live reminder
+        self.entries = {}
+        # task_id -> when of the last reminder shown, so reloads do not repeat it
+        self.fired = {}
+        self._seq = count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def remind_at(self, t):
+        """
+        When a task's reminder is due, or None if it has none (no next_due).
+        """
+        due = t.get("NEXT_DUE")
+        if not due:
+            return None
+        # fromisoformat: many times faster than strptime over a large load
+        return datetime.fromisoformat(due) + timedelta(hours=self.hour)
+
+    # ---------- CHANGES ----------
+    def load(self, tasks):
+        """
+        Replaces all reminders; heapify keeps this linear in len(tasks).
+        """
+        self.entries = {}
+        for t in tasks:
+            when = self.remind_at(t)
+            if when is not None and self.fired.get(t["ID"]) != when:
+                self.entries[t["ID"]] = (when, t)
+        self.heap = [(when, next(self._seq), tid) for tid, (when, _) in self.entries.items()]
+        heapq.heapify(self.heap)
+
+    def schedule(self, t):
+        """
+        Adds or moves the reminder of a task after it was added or edited.
+        """
+        when = self.remind_at(t)
+        if when is None or self.fired.get(t["ID"]) == when:
+            if self.entries.pop(t["ID"], None) is not None:
+                self._compact()
+            return
+        current = self.entries.get(t["ID"])
+        self.entries[t["ID"]] = (when, t)
+        if current is None or current[0] != when:
+            heapq.heappush(self.heap, (when, next(self._seq), t["ID"]))
+            self._compact()
+
+    def cancel(self, task_id):
+        """
+        Drops the reminder of a deleted task.
+        """
+        self.fired.pop(task_id, None)
+        if self.entries.pop(task_id, None) is not None:
+            self._compact()
+
+    # ---------- FIRING ----------
+    def next_time(self):
+        """
+        When the earliest live reminder is due, or None if there is none.
+        """
+        self._drop_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now):
+        """
+        Removes and returns the tasks whose reminders are due by now, earliest first.
+        """
+        due = []
+        while self.next_time() is not None and self.heap[0][0] <= now:
+            when, _, tid = heapq.heappop(self.heap)
+            due.append(self.entries.pop(tid)[1])
+            self.fired[tid] = when
+        return due
+
+    # ---------- HEAP UPKEEP ----------
+    def _live(self, item):
+        entry = self.entries.get(item[2])
+        return entry is not None and entry[0] == item[0]
+
+    def _drop_stale(self):
+        while self.heap and not self._live(self.heap[0]):
+            heapq.heappop(self.heap)
+
+    def _compact(self):
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = [item for item in self.heap if self._live(item)]
+            heapq.heapify(self.heap)
@@ -0,0 +1,407 @@
+"""
+HTTP/JSON task service, so many GUI clients share one small connection pool.
+
+    python service.py [--host 127.0.0.1] [--port 8765]
+
+Clients (client.RemoteTaskDB, or TaskManagerGUI with TASKMANAGER_SERVICE_URL
+set) log in with POST /login and send the session token it returns as
+"Authorization: Bearer <token>". Each user's task list and counts are cached
+in memory and dropped on that user's next write, so repeated reloads are
+answered without touching the database.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import config
+from auth_db import AuthDB
+from db import TaskDB
+from metrics import METRICS
+from task_store import LRUCache
+from utils import PRIORITY_RANK, str_to_date
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1 << 20
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _page_key(t):
+    """
+    get_tasks order as an ascending key; a (rank, id) page cursor maps to (-rank, -id).
+    """
+    return (-PRIORITY_RANK.get(t["PRIORITY"], 0), -t["ID"])
+
+
+# ================= CACHE =================
+
+class UserCache:
+    """
+    Per-user results (task list, counts) for the most recently active users.
+    Concurrent misses for the same entry share one database read, and a
+    write bumps the user's generation so a read that raced it is not kept.
+    Only touched from the event loop, so it needs no locking.
+    """
+
+    def __init__(self, maxsize):
+        # user -> {name: value}
+        self.entries = LRUCache(maxsize)
+        # (user, name) -> task reading it
+        self.loading = {}
+        self.generation = {}
+
+    async def get(self, user, name, load):
+        values = self.entries.get(user)
+        if values is not None and name in values:
+            METRICS.incr("service.cache.hit")
+            return values[name]
+        METRICS.incr("service.cache.miss")
+        task = self.loading.get((user, name))
+        if task is None:
+            task = asyncio.ensure_future(self._load(user, name, load))
+            self.loading[(user, name)] = task
+        # One caller going away must not cancel the read the others wait for
+        return await asyncio.shield(task)
+
+    async def _load(self, user, name, load):
+        generation = self.generation.get(user, 0)
+        try:
+            value = await load()
+        finally:
+            if self.loading.get((user, name)) is asyncio.current_task():
+                del self.loading[(user, name)]
+        if self.generation.get(user, 0) == generation:
+            values = self.entries.get(user) or {}
+            values[name] = value
+            self.entries.put(user, values)
+        return value
+
+    def invalidate(self, user):
+        self.generation[user] = self.generation.get(user, 0) + 1
+        self.entries.pop(user)
+        for key in [k for k in self.loading if k[0] == user]:
+            del self.loading[key]
+
+
+# ================= SERVICE =================
+
+class Request:
+    def __init__(self, user, token, ids, query, body):
+        self.user = user
+        self.token = token
+        self.ids = ids
+        self.query = query
+        self.body = body
+
+    def arg(self, name, default=None, convert=str):
+        values = self.query.get(name)
+        if not values:
+            return default
+        try:
+            return convert(values[0])
+        except ValueError:
+            raise HTTPError(400, f"Bad value for {name}: {values[0]!r}")
+
+
+class TaskService:
+    """
+    Routes requests to TaskDB/AuthDB. Database calls run on a thread pool no
+    larger than the connection pool, so excess requests wait in the executor
+    queue rather than timing out on a connection.
+    """
+
+    def __init__(self, tasks=None, auth=None, workers=None):
+        self.tasks = tasks or TaskDB()
+        self.auth = auth or AuthDB()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or config.POOL_MAX, thread_name_prefix="service-db"
+        )
+        self.cache = UserCache(config.SERVICE_CACHE_USERS)
+        # token -> (email, time it was last checked with AuthDB)
+        self.tokens = LRUCache(config.SERVICE_CACHE_USERS * 4)
+        # (method, pattern, handler, needs a session)
+        self.routes = [
+            ("POST", r"/login", self.login, False),
+            ("POST", r"/register", self.register, False),
+            ("GET", r"/session", self.session, True),
+            ("DELETE", r"/session", self.logout, True),
+            ("GET", r"/tasks", self.list_tasks, True),
+            ("POST", r"/tasks", self.add_task, True),
+            ("POST", r"/tasks/update", self.update_tasks, True),
+            ("POST", r"/tasks/delete", self.delete_tasks, True),
+            ("POST", r"/tasks/batch", self.write_batch, True),
+            ("GET", r"/tasks/(-?\d+)", self.get_task, True),
+            ("PUT", r"/tasks/(-?\d+)", self.update_task, True),
+            ("DELETE", r"/tasks/(-?\d+)", self.delete_task, True),
+            ("POST", r"/tasks/(-?\d+)/complete", self.complete_task, True),
+            ("GET", r"/tasks/(-?\d+)/description", self.get_description, True),
+            ("GET", r"/counts", self.counts, True),
+            ("GET", r"/search", self.search, True),
+            ("GET", r"/due", self.due, True),
+        ]
+        self.routes = [(m, re.compile(p + "$"), h, s) for m, p, h, s in self.routes]
+
+    async def db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    # ---------- AUTH ----------
+    async def authenticate(self, headers):
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            raise HTTPError(401, "Missing session token")
+        entry = self.tokens.get(token)
+        email, checked = entry if entry is not None else (None, None)
+        # A token not seen yet (or evicted) is always checked with AuthDB
+        if email is None or time.monotonic() - checked > config.SERVICE_TOKEN_TTL:
+            email = await self.db(self.auth.validate_session, token)
+            if email is None:
+                self.tokens.pop(token)
+                raise HTTPError(401, "Session expired")
+            self.tokens.put(token, (email, time.monotonic()))
+        return email, token
+
+    @staticmethod
+    def _credentials(req):
+        email, password = req.body.get("email"), req.body.get("password")
+        if not isinstance(email, str) or not isinstance(password, str):
+            raise HTTPError(400, "email and password are required")
+        return email, password
+
+    async def login(self, req):
+        email, password = self._credentials(req)
+        if not await self.db(self.auth.login, email, password):
+            raise HTTPError(401, "Invalid email or password")
+        days = req.body.get("days")
+        # A client may ask for a shorter session than SESSION_DAYS, never a longer one
+        if not isinstance(days, int) or not 0 < days < config.SESSION_DAYS:
+            days = None
+        token, expires_at = await self.db(self.auth.create_session, email, days)
+        return {"email": email, "token": token, "expires_at": expires_at.isoformat()}
+
+    async def register(self, req):
+        ok = await self.db(self.auth.register, *self._credentials(req))
+        return {"ok": ok}
+
+    async def session(self, req):
+        return {"email": req.user}
+
+    async def logout(self, req):
+        await self.db(self.auth.revoke_session, req.token)
+        self.tokens.pop(req.token)
+        return {"ok": True}
+
+    # ---------- READS ----------
+    def _load_list(self, user):
+        tasks = self.tasks.get_tasks(user)
+        return tasks, [_page_key(t) for t in tasks]
+
+    async def list_tasks(self, req):
+        """
+        get_tasks, or one keyset page of it (?limit=&after=rank,id), cut
+        from the cached list; ?full=1 reads whole descriptions uncached.
+        """
+        limit = req.arg("limit", None, int)
+        after = req.arg("after", None, lambda s: tuple(int(x) for x in s.split(",")))
+        if req.arg("full"):
+            tasks, cursor = await self.db(self.tasks.get_tasks_page, req.user, limit, after, True)
+            return {"tasks": tasks, "cursor": cursor}
+
+        tasks, keys = await self.cache.get(
+            req.user, "tasks", lambda: self.db(self._load_list, req.user)
+        )
+        if limit is None:
+            return {"tasks": tasks, "cursor": None}
+        start = bisect.bisect_right(keys, (-after[0], -after[1])) if after else 0
+        page = tasks[start:start + limit]
+        # Same rule as TaskDB.get_tasks_page: a full page may have a successor
+        cursor = None
+        if len(page) == limit:
+            cursor = (-keys[start + limit - 1][0], page[-1]["ID"])
+        return {"tasks": page, "cursor": cursor}
+
+    async def get_task(self, req):
+        return self._found(await self.db(self.tasks.get_task, req.ids[0], req.user))
+
+    async def get_description(self, req):
+        text = await self.db(self.tasks.get_description, req.ids[0], req.user)
+        return {"description": self._found(text)}
+
+    async def counts(self, req):
+        counts = await self.cache.get(
+            req.user, "counts", lambda: self.db(self.tasks.get_counts, req.user)
+        )
+        return [[c, s, n] for (c, s), n in counts.items()]
+
+    async def search(self, req):
+        return await self.db(self.tasks.search, req.user, req.arg("q", ""), req.arg("limit", 100, int))
+
+    async def due(self, req):
+        until = req.arg("until", None, str_to_date)
+        if until is None:
+            raise HTTPError(400, "until is required")
+        return await self.db(self.tasks.get_due, req.user, until)
+
+    # ---------- WRITES ----------
+    async def _write(self, user, fn, *args):
+        try:
+            return await self.db(fn, *args)
+        finally:
+            self.cache.invalidate(user)
+
+    async def add_task(self, req):
+        return await self._write(req.user, self.tasks.add_task, req.body, req.user)
+
+    async def update_task(self, req):
+        return self._found(
+            await self._write(req.user, self.tasks.update_task, req.ids[0], req.body, req.user)
+        )
+
+    async def complete_task(self, req):
+        return self._found(
+            await self._write(req.user, self.tasks.complete_task, req.ids[0], req.user)
+        )
+
+    async def delete_task(self, req):
+        return {"id": self._found(
+            await self._write(req.user, self.tasks.delete_task, req.ids[0], req.user)
+        )}
+
+    async def update_tasks(self, req):
+        """
+        Body: {"ids": [...], "changes": {field: value}} (see TaskDB.update_tasks).
+        """
+        try:
+            return await self._write(
+                req.user, self.tasks.update_tasks, req.body.get("ids", []),
+                req.body.get("changes", {}), req.user
+            )
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    async def delete_tasks(self, req):
+        ids = await self._write(req.user, self.tasks.delete_tasks, req.body.get("ids", []), req.user)
+        return {"ids": ids}
+
+    async def write_batch(self, req):
+        """
+        Body: {"ops": [...]} (see TaskDB.write_batch); one transaction for all of them.
+        """
+        try:
+            return await self._write(req.user, self.tasks.write_batch, req.body.get("ops", []), req.user)
+        except (KeyError, ValueError) as e:
+            raise HTTPError(400, f"Bad write op: {e}")
+
+    def _found(self, value):
+        if value is None:
+            raise HTTPError(404, "No such task")
+        return value
+
+    # ---------- HTTP ----------
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        allowed = False
+        for route_method, pattern, handler, needs_session in self.routes:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            user = token = None
+            if needs_session:
+                user, token = await self.authenticate(headers)
+            try:
+                data = json.loads(body) if body else {}
+            except ValueError:
+                raise HTTPError(400, "Body is not valid JSON")
+            if not isinstance(data, dict):
+                raise HTTPError(400, "Body must be a JSON object")
+            ids = [int(g) for g in match.groups()]
+            with METRICS.timer(f"service.{handler.__name__}"):
+                return await handler(Request(user, token, ids, parse_qs(url.query), data))
+        raise HTTPError(405 if allowed else 404, f"No route for {method} {url.path}")
+
+    async def handle(self, reader, writer):
+        """
+        One client connection; requests are answered in turn (HTTP/1.1 keep-alive).
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if not header.strip():
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    self._respond(writer, 413, {"error": "Request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = 200, await self.dispatch(method, target, headers, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    METRICS.incr("service.errors")
+                    status, payload = 500, {"error": str(e)}
+
+                close = version == "HTTP/1.0" or headers.get("connection", "").lower() == "close"
+                self._respond(writer, status, payload, close)
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, writer, status, payload, close=False):
+        # default=dict: Task records serialize as their GUI-keyed dicts
+        data = json.dumps(payload, ensure_ascii=False, default=dict).encode()
+        head = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            + ("Connection: close\r\n" if close else "")
+            + "\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Task Manager HTTP/JSON service")
+    parser.add_argument("--host", default=config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVICE_PORT)
+    args = parser.parse_args(argv)
+
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(TaskService().serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
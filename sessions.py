@@ -0,0 +1,79 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from datetime import datetime
+
+import config
+
+SESSION_FILE = "session.json"
+KEY_FILE = "session.key"
+
+
+def _path(name):
+    return os.path.join(config.SESSION_DIR, name)
+
+
+def _key():
+    """
+    Per-machine signing key, created on first use and readable only by this user.
+    """
+    path = _path(KEY_FILE)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        os.makedirs(config.SESSION_DIR, exist_ok=True)
+        key = secrets.token_bytes(32)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+
+def _sign(email, token, expires):
+    message = f"{email}\n{token}\n{expires}".encode()
+    return hmac.new(_key(), message, hashlib.sha256).hexdigest()
+
+
+def save_local_session(email, token, expires_at):
+    os.makedirs(config.SESSION_DIR, exist_ok=True)
+    expires = expires_at.isoformat()
+    data = {
+        "email": email,
+        "token": token,
+        "expires": expires,
+        "sig": _sign(email, token, expires),
+    }
+    path = _path(SESSION_FILE)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def load_local_session():
+    """
+    The locally cached session if its signature checks out and it has not
+    expired; None otherwise. No database access: the server-side check is
+    left to the caller to run in the background.
+    """
+    try:
+        with open(_path(SESSION_FILE), encoding="utf-8") as f:
+            data = json.load(f)
+        email, token, expires = data["email"], data["token"], data["expires"]
+        expected = _sign(email, token, expires)
+        if not hmac.compare_digest(expected, data["sig"]):
+            return None
+        if datetime.fromisoformat(expires) <= datetime.now():
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return {"email": email, "token": token}
+
+
+def clear_local_session():
+    try:
+        os.remove(_path(SESSION_FILE))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,512 @@
+import re
+import sqlite3
+from datetime import datetime
+
+import config
+
+try:
+    import oracledb
+except ImportError:  # only required by the Oracle backend
+    oracledb = None
+
+
+_SEARCH_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+def search_terms(text):
+    """
+    Splits a search box entry into terms: "quoted text" must match as a
+    phrase, anything else word by word as prefixes ("rev" finds "review").
+    Returns a list of (words, prefix) pairs, all of which must match.
+    """
+    terms = []
+    for phrase, word in _SEARCH_TOKEN.findall(text):
+        words = _WORD.findall(phrase or word)
+        if words:
+            terms.append((words, not phrase))
+    return terms
+
+
+class StorageBackend:
+    """
+    Engine specific pieces shared by TaskDB and AuthDB.
+    The CRUD SQL itself is common: both engines accept :name binds.
+    """
+    name = None
+    IntegrityError = Exception
+    DatabaseError = Exception
+
+    SCHEMA_VERSION_DDL = None
+    TASKS_DDL = None
+    USERS_DDL = None
+    TASKS_PAGE_INDEX_DDL = None
+    TASKS_VERSION_INDEX_DDL = None
+    TASKS_COUNTS_INDEX_DDL = None
+    TASKS_NEXT_DUE_INDEX_DDL = None
+    TASKS_CLIENT_OP_INDEX_DDL = None
+    TOMBSTONES_DDL = None
+    TOMBSTONES_INDEX_DDL = None
+    SESSIONS_DDL = None
+    PING_SQL = "SELECT 1"
+    # Appended to a query to cap the number of rows (binds :limit)
+    LIMIT_SQL = None
+    # First {length} characters of the description, without reading the whole LOB
+    DESCRIPTION_PREFIX_SQL = None
+    # Full-text index over title and description, and the ranked query using it
+    # ({columns}; binds :user_email and :query, best match first)
+    SEARCH_INDEX_DDL = ()
+    SEARCH_SQL = None
+
+    def connect(self):
+        raise NotImplementedError
+
+    def ping(self, conn):
+        """
+        Health check used by the connection pool before reusing a connection.
+        """
+        try:
+            cur = conn.cursor()
+            cur.execute(self.PING_SQL)
+            cur.fetchone()
+            cur.close()
+            return True
+        except self.DatabaseError:
+            return False
+
+    def create_table(self, conn, ddl):
+        """
+        Creates a table, ignoring the error raised when it already exists.
+        """
+        raise NotImplementedError
+
+    def insert_returning_id(self, cur, sql, params):
+        """
+        Runs an INSERT and returns the generated id without a second query.
+        """
+        raise NotImplementedError
+
+    def create_index(self, conn, ddl):
+        """
+        Creates an index, ignoring the error raised when it already exists.
+        """
+        self.create_table(conn, ddl)
+
+    def create_search_index(self, conn):
+        for ddl in self.SEARCH_INDEX_DDL:
+            self.create_index(conn, ddl)
+
+    def search_query(self, text):
+        """
+        The engine's query syntax for a search box entry (see search_terms);
+        None if it holds no words.
+        """
+        raise NotImplementedError
+
+    def add_column(self, conn, table, column_sql):
+        """
+        Adds a column to an existing table, ignoring the error raised when
+        it already exists. Any other error propagates, so the migration is
+        not recorded and runs again next time.
+        """
+        cur = conn.cursor()
+        try:
+            cur.execute(self._add_column_sql(table, column_sql))
+            conn.commit()
+        except self.DatabaseError as e:
+            if not self._column_exists(e):
+                raise
+        finally:
+            cur.close()
+
+    def _add_column_sql(self, table, column_sql):
+        raise NotImplementedError
+
+    def _column_exists(self, error):
+        """
+        Whether a DatabaseError from add_column means the column is already there.
+        """
+        raise NotImplementedError
+
+
+# ================= ORACLE =================
+
+class OracleBackend(StorageBackend):
+    name = "oracle"
+
+    SCHEMA_VERSION_DDL = """
+    CREATE TABLE schema_version (
+        version NUMBER PRIMARY KEY,
+        description VARCHAR2(200),
+        applied_at DATE DEFAULT SYSDATE
+    )
+    """
+
+    TASKS_DDL = """
+    CREATE TABLE tasks (
+        id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        user_email VARCHAR2(200) NOT NULL,
+        title VARCHAR2(200) NOT NULL,
+        description CLOB,
+        due_date DATE,
+        priority VARCHAR2(20),
+        category VARCHAR2(50),
+        status VARCHAR2(20)
+    )
+    """
+
+    USERS_DDL = """
+    CREATE TABLE users1122 (
+        id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        email VARCHAR2(200) NOT NULL UNIQUE,
+        password_hash VARCHAR2(64) NOT NULL
+    )
+    """
+
+    TASKS_PAGE_INDEX_DDL = """
+    CREATE INDEX tasks_user_rank_idx ON tasks (user_email, priority_rank, id)
+    """
+
+    TASKS_VERSION_INDEX_DDL = """
+    CREATE INDEX tasks_user_version_idx ON tasks (user_email, version)
+    """
+
+    TASKS_COUNTS_INDEX_DDL = """
+    CREATE INDEX tasks_user_counts_idx ON tasks (user_email, category, status)
+    """
+
+    TASKS_NEXT_DUE_INDEX_DDL = """
+    CREATE INDEX tasks_user_next_due_idx ON tasks (user_email, next_due)
+    """
+
+    TASKS_CLIENT_OP_INDEX_DDL = """
+    CREATE INDEX tasks_user_client_op_idx ON tasks (user_email, client_op)
+    """
+
+    TOMBSTONES_DDL = """
+    CREATE TABLE task_tombstones (
+        id NUMBER PRIMARY KEY,
+        user_email VARCHAR2(200) NOT NULL,
+        version NUMBER(15) NOT NULL
+    )
+    """
+
+    TOMBSTONES_INDEX_DDL = """
+    CREATE INDEX task_tombstones_version_idx ON task_tombstones (user_email, version)
+    """
+
+    SESSIONS_DDL = """
+    CREATE TABLE sessions (
+        token_hash VARCHAR2(64) PRIMARY KEY,
+        email VARCHAR2(200) NOT NULL,
+        created_at DATE NOT NULL,
+        expires_at DATE NOT NULL
+    )
+    """
+
+    LIMIT_SQL = "FETCH FIRST :limit ROWS ONLY"
+    DESCRIPTION_PREFIX_SQL = "DBMS_LOB.SUBSTR(description, {length}, 1)"
+
+    # Oracle Text; SYNC (ON COMMIT) keeps the indexes current with every write
+    SEARCH_INDEX_DDL = (
+        """
+        CREATE INDEX tasks_title_text_idx ON tasks (title)
+        INDEXTYPE IS CTXSYS.CONTEXT PARAMETERS ('SYNC (ON COMMIT)')
+        """,
+        """
+        CREATE INDEX tasks_desc_text_idx ON tasks (description)
+        INDEXTYPE IS CTXSYS.CONTEXT PARAMETERS ('SYNC (ON COMMIT)')
+        """,
+    )
+
+    # Title hits weigh double
+    SEARCH_SQL = """
+    SELECT {columns}
+    FROM tasks
+    WHERE user_email = :user_email
+    AND (CONTAINS(title, :query, 1) > 0 OR CONTAINS(description, :query, 2) > 0)
+    ORDER BY SCORE(1) * 2 + SCORE(2) DESC, priority_rank DESC, id DESC
+    """
+
+    def __init__(self, user=None, password=None, dsn=None):
+        if oracledb is None:
+            raise RuntimeError("The oracle backend requires the 'oracledb' package")
+        # Fetch CLOBs as str in the row itself instead of as LOB locators that
+        # each cost another round trip to read
+        oracledb.defaults.fetch_lobs = False
+        self.IntegrityError = oracledb.IntegrityError
+        self.DatabaseError = oracledb.DatabaseError
+        self.user = user or config.ORACLE_USER
+        self.password = password or config.ORACLE_PASSWORD
+        self.dsn = dsn or config.ORACLE_DSN
+
+    def connect(self):
+        return oracledb.connect(
+            user=self.user,
+            password=self.password,
+            dsn=self.dsn
+        )
+
+    def ping(self, conn):
+        try:
+            conn.ping()
+            return True
+        except oracledb.DatabaseError:
+            return False
+
+    def create_native_pool(self, min_size, max_size, timeout, ping_interval):
+        return oracledb.create_pool(
+            user=self.user,
+            password=self.password,
+            dsn=self.dsn,
+            min=min_size,
+            max=max_size,
+            increment=1,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=int(timeout * 1000),
+            ping_interval=int(ping_interval)
+        )
+
+    def create_table(self, conn, ddl):
+        """
+        Oracle does not support CREATE TABLE IF NOT EXISTS.
+        We safely ignore ORA-00955 (name already exists).
+        """
+        cur = conn.cursor()
+        try:
+            cur.execute(ddl)
+            conn.commit()
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            if error.code != 955:  # ORA-00955: name already used
+                raise
+        finally:
+            cur.close()
+
+    def create_index(self, conn, ddl):
+        cur = conn.cursor()
+        try:
+            cur.execute(ddl)
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            # ORA-00955: name already used, ORA-01408: columns already indexed
+            if error.code not in (955, 1408):
+                raise
+        finally:
+            cur.close()
+
+    def search_query(self, text):
+        # {braces} escape reserved words; a trailing % makes a prefix
+        terms = []
+        for words, prefix in search_terms(text):
+            escaped = [f"{{{w}}}" for w in words]
+            if prefix:
+                escaped[-1] = f"{words[-1]}%"
+            terms.append("(" + " ".join(escaped) + ")")
+        return " AND ".join(terms) or None
+
+    def insert_returning_id(self, cur, sql, params):
+        new_id = cur.var(oracledb.NUMBER)
+        cur.execute(sql + " RETURNING id INTO :new_id", dict(params, new_id=new_id))
+        return int(new_id.getvalue()[0])
+
+    def _add_column_sql(self, table, column_sql):
+        return f"ALTER TABLE {table} ADD ({column_sql})"
+
+    def _column_exists(self, error):
+        error, = error.args
+        return error.code == 1430  # ORA-01430: column being added already exists
+
+
+# ================= SQLITE =================
+
+def _adapt_datetime(value):
+    return value.isoformat(" ")
+
+
+def _convert_date(value):
+    return datetime.fromisoformat(value.decode())
+
+
+# DATE columns round-trip as datetime, matching what oracledb returns
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("DATE", _convert_date)
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+    IntegrityError = sqlite3.IntegrityError
+    DatabaseError = sqlite3.DatabaseError
+
+    SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description VARCHAR2(200),
+        applied_at DATE DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+
+    TASKS_DDL = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_email VARCHAR2(200) NOT NULL,
+        title VARCHAR2(200) NOT NULL,
+        description TEXT,
+        due_date DATE,
+        priority VARCHAR2(20),
+        category VARCHAR2(50),
+        status VARCHAR2(20)
+    )
+    """
+
+    USERS_DDL = """
+    CREATE TABLE IF NOT EXISTS users1122 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email VARCHAR2(200) NOT NULL UNIQUE,
+        password_hash VARCHAR2(64) NOT NULL
+    )
+    """
+
+    TASKS_PAGE_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS tasks_user_rank_idx ON tasks (user_email, priority_rank, id)
+    """
+
+    TASKS_VERSION_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS tasks_user_version_idx ON tasks (user_email, version)
+    """
+
+    TASKS_COUNTS_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS tasks_user_counts_idx ON tasks (user_email, category, status)
+    """
+
+    TASKS_NEXT_DUE_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS tasks_user_next_due_idx ON tasks (user_email, next_due)
+    """
+
+    TASKS_CLIENT_OP_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS tasks_user_client_op_idx ON tasks (user_email, client_op)
+    """
+
+    TOMBSTONES_DDL = """
+    CREATE TABLE IF NOT EXISTS task_tombstones (
+        id INTEGER PRIMARY KEY,
+        user_email VARCHAR2(200) NOT NULL,
+        version INTEGER NOT NULL
+    )
+    """
+
+    TOMBSTONES_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS task_tombstones_version_idx ON task_tombstones (user_email, version)
+    """
+
+    SESSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        token_hash VARCHAR2(64) PRIMARY KEY,
+        email VARCHAR2(200) NOT NULL,
+        created_at DATE NOT NULL,
+        expires_at DATE NOT NULL
+    )
+    """
+
+    LIMIT_SQL = "LIMIT :limit"
+    DESCRIPTION_PREFIX_SQL = "substr(description, 1, {length})"
+
+    # FTS5 table over tasks (external content), kept in step by triggers
+    SEARCH_INDEX_DDL = (
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts
+        USING fts5(title, description, content='tasks', content_rowid='id')
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update
+        AFTER UPDATE OF id, title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        # Index the rows written before the table existed
+        "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+    )
+
+    # bm25 is lower for better matches; title hits weigh ten times more
+    SEARCH_SQL = """
+    WITH hits AS (
+        SELECT rowid AS hit_id, bm25(tasks_fts, 10.0, 1.0) AS score
+        FROM tasks_fts
+        WHERE tasks_fts MATCH :query
+    )
+    SELECT {columns}
+    FROM tasks JOIN hits ON tasks.id = hits.hit_id
+    WHERE user_email = :user_email
+    ORDER BY score, priority_rank DESC, id DESC
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.SQLITE_PATH
+
+    def connect(self):
+        # Pooled connections are handed to whichever thread asks next
+        conn = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        # WAL lets readers run alongside the single writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def create_table(self, conn, ddl):
+        conn.execute(ddl)
+        conn.commit()
+
+    def search_query(self, text):
+        # "a b" is a phrase; a trailing * makes its last word a prefix
+        terms = [
+            '"' + " ".join(words) + '"' + ("*" if prefix else "")
+            for words, prefix in search_terms(text)
+        ]
+        return " ".join(terms) or None
+
+    def insert_returning_id(self, cur, sql, params):
+        cur.execute(sql, params)
+        return cur.lastrowid
+
+    def _add_column_sql(self, table, column_sql):
+        return f"ALTER TABLE {table} ADD COLUMN {column_sql}"
+
+    def _column_exists(self, error):
+        return "duplicate column name" in str(error)
+
+
+# ================= FACTORY =================
+
+BACKENDS = {
+    "oracle": OracleBackend,
+    "sqlite": SQLiteBackend,
+}
+
+
+def get_backend(name=None):
+    """
+    Returns a backend instance; defaults to config.DB_BACKEND.
+    """
+    name = (name or config.DB_BACKEND).lower()
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {name!r}") from None
@@ -0,0 +1,533 @@
+"""
+Local write-behind cache of one user's tasks.
+
+CachedTaskDB stands in for TaskDB in the GUI. Reads and writes go to a
+SQLite replica on disk. Each write also goes into an outbox table in the
+same transaction, so nothing is lost if the app closes while offline.
+
+SyncEngine runs on a background thread and does three things:
+- sends the outbox to the server in batches (TaskDB.apply_changes);
+- replaces the temporary negative ids of tasks created locally with the
+  ids the server assigned;
+- pulls rows that were changed elsewhere, and the ids of rows deleted
+  elsewhere (the server's task_tombstones).
+
+Each queued add carries an op id unique to this replica, so a push that is
+sent again after a lost reply does not add the task twice.
+
+When two writes to the same row conflict, the one with the higher
+tasks.version (a millisecond timestamp) wins.
+"""
+import hashlib
+import json
+import os
+import secrets
+import threading
+
+import config
+from db import TaskDB, new_version, task_input
+from metrics import METRICS, timed
+from pool import ConnectionPool
+from storage import SQLiteBackend
+
+OUTBOX_DDL = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op VARCHAR2(10) NOT NULL,
+    task_id INTEGER NOT NULL,
+    task TEXT,
+    version INTEGER NOT NULL
+)
+"""
+
+SYNC_STATE_DDL = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    name VARCHAR2(50) PRIMARY KEY,
+    value INTEGER NOT NULL
+)
+"""
+
+# Writes the replica row for both local edits and rows pulled from the server.
+# An upsert rather than INSERT OR REPLACE so the search index triggers see an UPDATE.
+UPSERT_TASK_SQL = """
+INSERT INTO tasks
+(id, user_email, title, description, due_date, priority, category, status, priority_rank,
+ version, recurrence, next_due)
+VALUES (:id, :user_email, :title, :description, :due_date, :priority, :category, :status,
+        :priority_rank, :version, :recurrence, :next_due)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title,
+    description = excluded.description,
+    due_date = excluded.due_date,
+    priority = excluded.priority,
+    category = excluded.category,
+    status = excluded.status,
+    priority_rank = excluded.priority_rank,
+    version = excluded.version,
+    recurrence = excluded.recurrence,
+    next_due = excluded.next_due
+"""
+
+# Pulls overlap the previous one by this much, in case other clients' clocks lag
+CLOCK_SKEW_MS = 5 * 60 * 1000
+
+
+def cache_path(user_email):
+    name = hashlib.sha256(user_email.lower().encode()).hexdigest()[:16]
+    return os.path.join(config.CACHE_DIR, f"cache-{name}.db")
+
+
+class CachedTaskDB:
+    """
+    Same interface as TaskDB for the calls the GUI makes, served from the
+    local replica. Writes return as soon as they are committed locally.
+    """
+
+    def __init__(self, user_email, remote=None, path=None):
+        self.user_email = user_email
+        self.path = path or cache_path(user_email)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self.pool = ConnectionPool(SQLiteBackend(self.path), min_size=1, max_size=2)
+        # Same schema and queries as the server; migrations create the tasks table
+        self.local = TaskDB(self.pool, tombstones=False)
+        # Serializes replica writes between the DB worker and the sync thread
+        self._lock = threading.Lock()
+        # Temporary id -> server id for tasks reconciled while the GUI held the old id
+        self._reconciled = {}
+        # (temporary id, server id) pairs the GUI has not renumbered yet
+        self._renumbered = []
+
+        with self.pool.connection() as conn:
+            self.pool.backend.create_table(conn, OUTBOX_DDL)
+            self.pool.backend.create_table(conn, SYNC_STATE_DDL)
+            cur = conn.cursor()
+            cur.execute("SELECT COUNT(*), MIN(task_id) FROM outbox")
+            self.pending, low_queued = cur.fetchone()
+            cur.execute("SELECT MIN(id) FROM tasks")
+            low_stored, = cur.fetchone()
+            cur.execute("SELECT value FROM sync_state WHERE name = 'client_id'")
+            row = cur.fetchone()
+            if row is None:
+                row = (secrets.randbits(62),)
+                cur.execute("INSERT INTO sync_state (name, value) VALUES ('client_id', :v)", {"v": row[0]})
+                conn.commit()
+        # Prefixes the op ids of pushed adds (see outbox)
+        self.client_id = row[0]
+        # Never reuse a temporary id the outbox may still refer to
+        self._next_temp_id = min(0, low_queued or 0, low_stored or 0) - 1
+
+        self.sync = SyncEngine(self, remote)
+        self.sync.start()
+
+    def close(self):
+        self.sync.stop()
+        self.sync.join(timeout=2)
+        self.pool.close()
+
+    # ================= READS =================
+
+    def get_tasks(self, user_email):
+        return self.local.get_tasks(user_email)
+
+    def get_tasks_page(self, user_email, limit, after=None, full=False):
+        return self.local.get_tasks_page(user_email, limit, after, full)
+
+    def iter_tasks(self, user_email, page_size=1000, full=False):
+        return self.local.iter_tasks(user_email, page_size, full)
+
+    def get_due(self, user_email, until):
+        return self.local.get_due(user_email, until)
+
+    def search(self, user_email, text, limit=100):
+        return self.local.search(user_email, text, limit)
+
+    def get_task(self, task_id, user_email):
+        # Under the lock, so the row is not renumbered between lookup and read
+        with self._lock:
+            return self.local.get_task(self._reconciled.get(task_id, task_id), user_email)
+
+    def get_description(self, task_id, user_email):
+        with self._lock:
+            return self.local.get_description(self._reconciled.get(task_id, task_id), user_email)
+
+    def get_counts(self, user_email):
+        return self.local.get_counts(user_email)
+
+    # ================= WRITES =================
+
+    @timed("CachedTaskDB.add_task")
+    def add_task(self, task, user_email):
+        with self._lock, self.pool.connection() as conn:
+            stored = self._add(conn.cursor(), task, user_email)
+            conn.commit()
+        self.sync.kick()
+        return stored
+
+    @timed("CachedTaskDB.update_task")
+    def update_task(self, task_id, task, user_email):
+        # Under the lock, so a reconciliation cannot slip in between
+        with self._lock, self.pool.connection() as conn:
+            stored = self._update(conn.cursor(), self._reconciled.get(task_id, task_id),
+                                  task, user_email)
+            conn.commit()
+        self.sync.kick()
+        return stored
+
+    @timed("CachedTaskDB.complete_task")
+    def complete_task(self, task_id, user_email):
+        task = self.get_task(task_id, user_email)
+        if task is None:
+            return None
+        return self.update_task(
+            task["ID"], dict(task_input(task), status="Completed", next_due=None), user_email
+        )
+
+    @timed("CachedTaskDB.delete_task")
+    def delete_task(self, task_id, user_email):
+        with self._lock, self.pool.connection() as conn:
+            task_id = self._reconciled.get(task_id, task_id)
+            cur = conn.cursor()
+            version = self._next_version(cur, task_id)
+            if version is None:
+                return None
+            cur.execute("DELETE FROM tasks WHERE id = :id", {"id": task_id})
+            self._enqueue(cur, "delete", task_id, None, version)
+            conn.commit()
+        self.sync.kick()
+        return task_id
+
+    @timed("CachedTaskDB.update_tasks")
+    def update_tasks(self, task_ids, changes, user_email):
+        with self._lock, self.pool.connection() as conn:
+            tasks = self._update_many(conn.cursor(), self._resolve(task_ids), changes, user_email)
+            conn.commit()
+        self.sync.kick()
+        return tasks
+
+    @timed("CachedTaskDB.delete_tasks")
+    def delete_tasks(self, task_ids, user_email):
+        with self._lock, self.pool.connection() as conn:
+            deleted = self._delete_many(conn.cursor(), self._resolve(task_ids), user_email)
+            conn.commit()
+        self.sync.kick()
+        return deleted
+
+    @timed("CachedTaskDB.write_batch")
+    def write_batch(self, ops, user_email):
+        """
+        TaskDB.write_batch against the replica: one local transaction, with
+        the outbox entries of every op in it.
+        """
+        with self._lock, self.pool.connection() as conn:
+            cur = conn.cursor()
+            results = [self._write_op(cur, op, user_email) for op in ops]
+            conn.commit()
+        self.sync.kick()
+        return results
+
+    def _write_op(self, cur, op, user_email):
+        kind = op["op"]
+        if kind == "add":
+            return {"before": [], "after": [self._add(cur, op["task"], user_email)]}
+        ids = self._resolve(op["ids"] if "ids" in op else [op["id"]])
+        before = self.local._select_tasks(cur, ids, user_email)
+        if kind in ("update", "restore"):
+            stored = before and self._update(cur, ids[0], op["task"], user_email,
+                                             resolve=kind == "update")
+            return {"before": before, "after": [stored] if stored else []}
+        if kind == "update_many":
+            return {"before": before, "after": self._update_many(cur, ids, op["changes"], user_email)}
+        if kind == "delete":
+            self._delete_many(cur, [t.id for t in before], user_email)
+            return {"before": before, "after": []}
+        raise ValueError(f"Unknown write op {kind!r}")
+
+    # ---------- inside the caller's transaction, under the lock ----------
+    def _resolve(self, task_ids):
+        return [self._reconciled.get(i, i) for i in task_ids]
+
+    def _add(self, cur, task, user_email):
+        params = self.local._task_params(task)
+        task_id = self._next_temp_id
+        self._next_temp_id -= 1
+        cur.execute(UPSERT_TASK_SQL, dict(params, id=task_id, user_email=user_email))
+        stored = self.local._params_to_task(task_id, params)
+        self._enqueue(cur, "add", task_id, task_input(stored), params["version"])
+        return stored
+
+    def _update(self, cur, task_id, task, user_email, resolve=True):
+        """
+        Returns the stored task, or None if there is no such row. With
+        resolve=False the row is written exactly as given (undo/redo).
+        """
+        params = self.local._task_params(task)
+        version = self._next_version(cur, task_id)
+        if version is None:
+            return None
+        params["version"] = version
+        if resolve and params["recurrence"]:
+            self.local._resolve_recurrence(cur, task_id, user_email, params)
+        cur.execute(UPSERT_TASK_SQL, dict(params, id=task_id, user_email=user_email))
+        # Send the resolved row (next_due, status) so the server does not advance it again
+        stored = self.local._params_to_task(task_id, params)
+        self._enqueue(cur, "update", task_id, task_input(stored), version)
+        return stored
+
+    def _update_many(self, cur, task_ids, changes, user_email):
+        version = self._bulk_version(cur, task_ids)
+        tasks = self.local._update_tasks(cur, task_ids, changes, user_email, version)
+        # The server applies whole rows, one outbox entry per task
+        for t in tasks:
+            self._enqueue(cur, "update", t["ID"], task_input(t), version)
+        return tasks
+
+    def _delete_many(self, cur, task_ids, user_email):
+        version = self._bulk_version(cur, task_ids)
+        deleted = self.local._delete_tasks(cur, task_ids, user_email)
+        for task_id in deleted:
+            self._enqueue(cur, "delete", task_id, None, version)
+        return deleted
+
+    def _bulk_version(self, cur, task_ids):
+        """
+        One version for a bulk write, above that of every row it touches
+        (see _next_version).
+        """
+        version = new_version()
+        for in_list, binds in self.local._in_chunks(task_ids):
+            cur.execute(f"SELECT MAX(version) FROM tasks WHERE id IN ({in_list})", binds)
+            highest, = cur.fetchone()
+            if highest is not None:
+                version = max(version, highest + 1)
+        return version
+
+    def _next_version(self, cur, task_id):
+        """
+        Version for a local write to task_id, or None if there is no such row.
+        Always above the version the edit was based on, even if this
+        machine's clock is behind the one that wrote it.
+        """
+        cur.execute("SELECT version FROM tasks WHERE id = :id", {"id": task_id})
+        row = cur.fetchone()
+        if row is None:
+            return None
+        return max(new_version(), row[0] + 1)
+
+    def _enqueue(self, cur, op, task_id, task, version):
+        cur.execute(
+            "INSERT INTO outbox (op, task_id, task, version) VALUES (:1, :2, :3, :4)",
+            (op, task_id, json.dumps(task) if task is not None else None, version)
+        )
+        self.pending += 1
+
+    # ================= SYNC (sync thread) =================
+
+    def outbox(self, limit):
+        """
+        The oldest queued writes, as (seq, change) in the shape TaskDB.apply_changes takes.
+        Adds get an op id from the client id and seq, which are never reused.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT seq, op, task_id, task, version FROM outbox ORDER BY seq LIMIT :limit",
+                {"limit": limit}
+            )
+            rows = cur.fetchall()
+        entries = []
+        for seq, op, task_id, task, version in rows:
+            change = {
+                "op": op,
+                "id": task_id,
+                "task": json.loads(task) if task is not None else None,
+                "version": version,
+            }
+            if op == "add":
+                change["op_id"] = f"{self.client_id}-{seq}"
+            entries.append((seq, change))
+        return entries
+
+    def acknowledge(self, entries, results):
+        """
+        Applies the server's answers to a pushed batch and drops it from the
+        outbox. Returns True if the server overruled local rows, which the GUI
+        has not seen; new server ids are left for take_renumbered instead.
+        """
+        changed = False
+        new_ids = {}
+        with self._lock, self.pool.connection() as conn:
+            cur = conn.cursor()
+            for (seq, change), (status, value) in zip(entries, results):
+                task_id = new_ids.get(change["id"], change["id"])
+
+                if status == "added":
+                    new_ids[task_id] = value
+                    self._reconciled[task_id] = value
+                    keys = {"old": task_id, "new": value}
+                    cur.execute("UPDATE tasks SET id = :new WHERE id = :old", keys)
+                    cur.execute("UPDATE outbox SET task_id = :new WHERE task_id = :old", keys)
+                    self._renumbered.append((task_id, value))
+                elif status in ("stale", "missing") and not self._queued_after(cur, seq, task_id):
+                    # The server's row is newer (or gone): it wins
+                    if status == "stale":
+                        task, version = value
+                        self._store(cur, task, version)
+                    else:
+                        cur.execute("DELETE FROM tasks WHERE id = :id", {"id": task_id})
+                    changed = True
+
+            cur.execute("DELETE FROM outbox WHERE seq <= :seq", {"seq": entries[-1][0]})
+            conn.commit()
+            self.pending -= len(entries)
+        return changed
+
+    def take_renumbered(self):
+        """
+        (temporary id, server id) of the tasks given server ids since the
+        last call, oldest first; for the GUI to renumber its rows in place.
+        """
+        with self._lock:
+            renumbered, self._renumbered = self._renumbered, []
+        return renumbered
+
+    def merge(self, changes, deleted_ids, pulled_version, snapshot=False):
+        """
+        Brings in rows written elsewhere and drops rows deleted elsewhere.
+        A snapshot holds every server row, so stored rows missing from it
+        are dropped too. Rows with queued local writes are left alone; the
+        push decides those. Returns True if the replica changed.
+        """
+        changed = False
+        with self._lock, self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT DISTINCT task_id FROM outbox")
+            queued = {r[0] for r in cur.fetchall()}
+            cur.execute("SELECT id, version FROM tasks WHERE id > 0")
+            local = dict(cur.fetchall())
+
+            for task, version in changes:
+                if task["ID"] in queued or local.get(task["ID"]) == version:
+                    continue
+                self._store(cur, task, version)
+                changed = True
+
+            if snapshot:
+                deleted_ids = local.keys() - {task["ID"] for task, _ in changes}
+            for task_id in (local.keys() & set(deleted_ids)) - queued:
+                cur.execute("DELETE FROM tasks WHERE id = :id", {"id": task_id})
+                changed = True
+
+            cur.execute(
+                "INSERT OR REPLACE INTO sync_state (name, value) VALUES ('pulled_through', :v)",
+                {"v": pulled_version}
+            )
+            conn.commit()
+        return changed
+
+    def pulled_version(self):
+        """
+        Highest version pulled so far, or None before the first pull.
+        Replicas from before deletions were pulled take one snapshot again.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT value FROM sync_state WHERE name = 'pulled_through'")
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def _queued_after(self, cur, seq, task_id):
+        cur.execute(
+            "SELECT 1 FROM outbox WHERE seq > :seq AND task_id = :id LIMIT 1",
+            {"seq": seq, "id": task_id}
+        )
+        return cur.fetchone() is not None
+
+    def _store(self, cur, task, version):
+        params = dict(self.local._task_params(task_input(task)), version=version)
+        cur.execute(UPSERT_TASK_SQL, dict(params, id=task["ID"], user_email=self.user_email))
+
+
+class SyncEngine(threading.Thread):
+    """
+    Background thread keeping a CachedTaskDB and the server in step.
+    A round pushes the whole outbox, one batch per transaction, then pulls.
+    While the server is unreachable it retries with exponential backoff;
+    a local write starts a round immediately.
+
+    online, last_error and generation are read by the GUI. generation goes
+    up whenever rows change underneath it (pulled rows, or the server
+    overruling a push), meaning it should reload; new ids alone are handed
+    over by CachedTaskDB.take_renumbered.
+    """
+
+    def __init__(self, cache, remote=None, interval=None, batch_size=None):
+        super().__init__(name="task-sync", daemon=True)
+        self.cache = cache
+        # The server TaskDB; created on the first round so startup works offline
+        self.remote = remote
+        self.interval = config.SYNC_INTERVAL if interval is None else interval
+        self.batch_size = batch_size or config.SYNC_BATCH_SIZE
+
+        self.online = None  # unknown until the first round
+        self.last_error = None
+        self.generation = 0
+        self._wake = threading.Event()
+        self._stopped = False
+
+    def kick(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def run(self):
+        delay = self.interval
+        while not self._stopped:
+            try:
+                with METRICS.timer("sync.round"):
+                    self.sync_once()
+            except Exception as e:  # offline or server error: the outbox keeps it all
+                METRICS.incr("sync.errors")
+                self.online, self.last_error = False, e
+                delay = min(delay * 2, config.SYNC_MAX_BACKOFF)
+            else:
+                self.online, self.last_error = True, None
+                delay = self.interval
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def sync_once(self):
+        if self.remote is None:
+            self.remote = TaskDB()
+        while self.push():
+            pass
+        self.pull()
+
+    def push(self):
+        """
+        Sends one batch of the outbox. Returns True if more may be waiting.
+        """
+        entries = self.cache.outbox(self.batch_size)
+        if not entries:
+            return False
+        results = self.remote.apply_changes(
+            [change for _, change in entries], self.cache.user_email
+        )
+        METRICS.incr("sync.pushed", len(entries))
+        if self.cache.acknowledge(entries, results):
+            self.generation += 1
+        return len(entries) == self.batch_size
+
+    def pull(self):
+        pulled = self.cache.pulled_version()
+        # The first pull is a full snapshot, rows of any version included
+        since = -1 if pulled is None else max(0, pulled - CLOCK_SKEW_MS)
+        changes = self.remote.get_changes(self.cache.user_email, since)
+        deletions = [] if pulled is None else self.remote.get_deletions(self.cache.user_email, since)
+        METRICS.incr("sync.pulled", len(changes) + len(deletions))
+        versions = [version for _, version in changes + deletions]
+        pulled = max([since if pulled is None else pulled] + versions)
+        if self.cache.merge(changes, [task_id for task_id, _ in deletions], pulled, snapshot=since < 0):
+            self.generation += 1
@@ -0,0 +1,292 @@
+import bisect
+from collections import OrderedDict
+
+from utils import PRIORITY_RANK
+
+
+def task_sort_key(t):
+    """
+    Same order as TaskDB.get_tasks: priority (High > Medium > Low), then newest first.
+    """
+    return (-PRIORITY_RANK.get(t["PRIORITY"], 0), -t["ID"])
+
+
+def sorted_index(tasks, t):
+    """
+    Position of t in a list kept sorted by task_sort_key.
+    """
+    return bisect.bisect_left(tasks, task_sort_key(t), key=task_sort_key)
+
+
+def _due_key(t):
+    # The date the Due column shows; ISO dates sort chronologically, undated last
+    due = t["NEXT_DUE"] if t.get("RECURRENCE") else t["DUE_DATE"]
+    return (not due, due)
+
+
+# Table heading -> sort key of that column
+COLUMN_KEYS = {
+    "ID": lambda t: t["ID"],
+    "Title": lambda t: t["TITLE"].casefold(),
+    "Description": lambda t: (t["DESCRIPTION"] or "").casefold(),
+    "Due": _due_key,
+    "Priority": lambda t: PRIORITY_RANK.get(t["PRIORITY"], 0),
+    "Category": lambda t: (t["CATEGORY"] or "").casefold(),
+    "Status": lambda t: t["STATUS"],
+}
+
+
+class TaskStore:
+    """
+    In-memory task list kept in display order, indexed by ID and by
+    category. The indexes are updated incrementally by add/update/remove,
+    so the category filter never rescans the whole list. Search goes to
+    the database (TaskDB.search) and counts to TaskCounts.
+    """
+
+    def __init__(self, tasks=()):
+        self.load(tasks)
+
+    def load(self, tasks):
+        self.tasks = sorted(tasks, key=task_sort_key)
+        self.by_id = {}
+        self.by_category = {}
+        for t in self.tasks:
+            self._index(t)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def get(self, task_id):
+        return self.by_id.get(task_id)
+
+    # ---------- CHANGES ----------
+    def add(self, t):
+        bisect.insort(self.tasks, t, key=task_sort_key)
+        self._index(t)
+
+    def extend(self, tasks):
+        """
+        Adds many tasks at once: one sort (cheap when they arrive in display
+        order, as pages do) instead of an insertion each.
+        """
+        self.tasks.extend(tasks)
+        self.tasks.sort(key=task_sort_key)
+        for t in tasks:
+            self._index(t)
+
+    def update(self, t):
+        """
+        Replaces the task with the same ID; returns the previous version.
+        """
+        old = self.remove(t["ID"])
+        self.add(t)
+        return old
+
+    def remove(self, task_id):
+        """
+        Drops a task; returns it, or None if it was not loaded.
+        """
+        old = self.by_id.get(task_id)
+        if old is None:
+            return None
+        self.tasks.pop(sorted_index(self.tasks, old))
+        self._unindex(old)
+        return old
+
+    # ---------- QUERIES ----------
+    def query(self, category=None):
+        """
+        Tasks in display order, restricted to a category.
+        """
+        if not category:
+            return list(self.tasks)
+        ids = self.by_category.get(category, ())
+        return sorted((self.by_id[i] for i in ids), key=task_sort_key)
+
+    def matches(self, t, category=None):
+        """
+        Whether a single task passes the same filter as query().
+        """
+        return not category or t["CATEGORY"] == category
+
+    # ---------- INDEXES ----------
+    def _index(self, t):
+        tid = t["ID"]
+        self.by_id[tid] = t
+        self.by_category.setdefault(t["CATEGORY"], set()).add(tid)
+
+    def _unindex(self, t):
+        tid = t["ID"]
+        del self.by_id[tid]
+        _discard(self.by_category, t["CATEGORY"], tid)
+
+
+def _discard(index, key, tid):
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(tid)
+        if not ids:
+            del index[key]
+
+
+class _Descending:
+    """
+    Wraps a sort key so it compares in reverse, for descending columns
+    inside a composite key.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class SortOrder:
+    """
+    A user-chosen table order: (column, descending) pairs, most significant
+    first, with task_sort_key breaking ties. Column keys are computed once
+    per task and cached by ID; a cached key is reused only while the task
+    object is the same, so an edited task (a new object) is keyed afresh.
+    """
+
+    def __init__(self):
+        self.columns = []
+        # column -> {task ID: (task, key)}
+        self.cache = {}
+        # column -> its key function, made once
+        self._keys = {}
+
+    def __bool__(self):
+        return bool(self.columns)
+
+    def click(self, column, add=False):
+        """
+        A heading click: ascending, then descending, then back to the
+        default order. With add (Shift), the column becomes a further key
+        (or flips, if it already is one) and the others stay.
+        """
+        current = dict(self.columns)
+        if add:
+            if column in current:
+                self.columns = [(c, not d if c == column else d) for c, d in self.columns]
+            else:
+                self.columns.append((column, False))
+        elif self.columns and self.columns[0][0] == column and len(self.columns) == 1:
+            self.columns = [] if current[column] else [(column, True)]
+        else:
+            self.columns = [(column, False)]
+
+    def column_key(self, column):
+        """
+        The cached key function of a column (None: task_sort_key).
+        """
+        key = self._keys.get(column)
+        if key is not None:
+            return key
+        cache = self.cache.setdefault(column, {})
+        compute = COLUMN_KEYS[column] if column else task_sort_key
+
+        def key(t):
+            entry = cache.get(t["ID"])
+            if entry is None or entry[0] is not t:
+                entry = cache[t["ID"]] = (t, compute(t))
+            return entry[1]
+        self._keys[column] = key
+        return key
+
+    def key(self, t):
+        """
+        Composite key for bisecting a sorted list (e.g. to insert one task).
+        """
+        column_key = self.column_key
+        parts = []
+        for column, descending in self.columns:
+            k = column_key(column)(t)
+            parts.append(_Descending(k) if descending else k)
+        parts.append(column_key(None)(t))
+        return tuple(parts)
+
+    def sort(self, tasks):
+        """
+        tasks in this order (a new list). Done as one stable sort per column,
+        least significant first, so keys compare natively rather than
+        through the key() wrappers.
+        """
+        tasks = sorted(tasks, key=self.column_key(None))
+        for column, descending in reversed(self.columns):
+            tasks.sort(key=self.column_key(column), reverse=descending)
+        return tasks
+
+    def forget(self, task_id):
+        for cache in self.cache.values():
+            cache.pop(task_id, None)
+
+
+class TaskCounts:
+    """
+    Task counts per (category, status), as returned by TaskDB.get_counts.
+    Covers all of the user's tasks, not just the loaded pages, and is kept
+    current by add/remove as the GUI applies its own writes.
+    """
+
+    def __init__(self, counts=None):
+        self.counts = dict(counts or {})
+
+    def add(self, t, n=1):
+        key = (t["CATEGORY"], t["STATUS"])
+        self.counts[key] = self.counts.get(key, 0) + n
+        if not self.counts[key]:
+            del self.counts[key]
+
+    def remove(self, t):
+        self.add(t, -1)
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def status_count(self, status):
+        return sum(n for (_, s), n in self.counts.items() if s == status)
+
+    def category_counts(self):
+        counts = {}
+        for (c, _), n in self.counts.items():
+            if c:
+                counts[c] = counts.get(c, 0) + n
+        return counts
+
+
+class LRUCache:
+    """
+    Small mapping that forgets its least recently used entry past maxsize.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def get(self, key, default=None):
+        if key not in self.data:
+            return default
+        self.data.move_to_end(key)
+        return self.data[key]
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def pop(self, key):
+        self.data.pop(key, None)
+
+    def clear(self):
+        self.data.clear()
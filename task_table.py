@@ -0,0 +1,360 @@
+import bisect
+
+# Extra rows materialized below the visible window
+OVERSCAN = 5
+# Rows moved per mouse wheel notch
+WHEEL_STEP = 3
+# Fraction of the list scrolled past before asking for more rows
+NEAR_END = 0.9
+
+
+def _in_order(iids, position):
+    """
+    Largest set of iids whose old positions already increase in the new
+    order (a longest increasing subsequence). Those items stay where they
+    are; only the others need moving.
+    """
+    tails, tail_positions, previous = [], [], {}
+    for iid in iids:
+        pos = position.get(iid)
+        if pos is None:
+            continue
+        k = bisect.bisect_left(tail_positions, pos)
+        previous[iid] = tails[k - 1] if k else None
+        if k == len(tails):
+            tails.append(iid)
+            tail_positions.append(pos)
+        else:
+            tails[k] = iid
+            tail_positions[k] = pos
+
+    keep = set()
+    iid = tails[-1] if tails else None
+    while iid is not None:
+        keep.add(iid)
+        iid = previous[iid]
+    return keep
+
+
+class TaskTable:
+    """
+    Plain mode: one Treeview item per row, with the task ID as its iid.
+    `rows` is the displayed list of task dicts, in display order. Rows are
+    selected with the Treeview's own Ctrl/Shift-click handling.
+    on_near_end, if set, is called when the user scrolls close to the last row.
+    """
+
+    def __init__(self, tree, row_values):
+        self.tree = tree
+        self.row_values = row_values
+        self.rows = []
+        self.iids = []
+        # iid -> values last written to the item
+        self.values = {}
+        # iid -> (focused, selected) carried over by rename
+        self.renamed = {}
+        self.on_near_end = None
+        tree.configure(yscrollcommand=self._on_yscroll)
+        tree.bind("<Control-a>", lambda e: self.select_all() or "break")
+
+    def set_rows(self, rows, top=False):
+        """
+        Diffs rows against what the Treeview shows: only items that were
+        added, removed, changed or moved cost a Tk call, so a reload or a
+        search keystroke that changes little touches little. With top (a
+        new view rather than a redraw of the same one) it scrolls back to
+        the first row; otherwise the scroll position stays.
+        """
+        rows = list(rows)
+        iids = [str(t["ID"]) for t in rows]
+        wanted = set(iids)
+
+        gone = [iid for iid in self.iids if iid not in wanted]
+        if gone:
+            self.tree.delete(*gone)
+        position = {iid: i for i, iid in enumerate(self.iids) if iid in wanted}
+        stay = _in_order(iids, position)
+        # With the movers detached, the tree's first i items always equal iids[:i]
+        moving = [iid for iid in iids if iid in position and iid not in stay]
+        if moving:
+            self.tree.detach(*moving)
+
+        values = {}
+        for i, (iid, t) in enumerate(zip(iids, rows)):
+            values[iid] = self.row_values(t)
+            if iid not in position:
+                self.tree.insert("", i, iid=iid, values=values[iid])
+                continue
+            if iid not in stay:
+                self.tree.move(iid, "", i)
+            if self.values[iid] != values[iid]:
+                self.tree.item(iid, values=values[iid])
+
+        self.rows, self.iids, self.values = rows, iids, values
+        if top:
+            self.tree.yview_moveto(0)
+
+    def insert(self, index, t):
+        iid = str(t["ID"])
+        self.rows.insert(index, t)
+        self.iids.insert(index, iid)
+        self.values[iid] = self.row_values(t)
+        self.tree.insert("", index, iid=iid, values=self.values[iid])
+        focus, selected = self.renamed.pop(iid, (False, False))
+        if focus:
+            self.tree.focus(iid)
+        if selected:
+            self.tree.selection_add(iid)
+
+    def delete(self, index):
+        self.rows.pop(index)
+        iid = self.iids.pop(index)
+        del self.values[iid]
+        self.tree.delete(iid)
+
+    def _on_yscroll(self, first, last):
+        if self.on_near_end and float(last) >= NEAR_END:
+            self.on_near_end()
+
+    def selected_id(self):
+        sel = self.tree.focus()
+        if sel not in self.values:
+            return None
+        return int(sel)
+
+    def selected_ids(self):
+        """
+        IDs of all selected rows, in display order.
+        """
+        return [int(iid) for iid in self.tree.selection() if iid in self.values]
+
+    def rename(self, old_id, new_id):
+        """
+        Before a row is replaced by the same task under a new id: the new
+        row gets the old one's focus and selection when it is inserted.
+        """
+        old = str(old_id)
+        if old == self.tree.focus() or old in self.tree.selection():
+            self.renamed[str(new_id)] = (old == self.tree.focus(), old in self.tree.selection())
+
+    def select_all(self):
+        self.tree.selection_set(self.iids)
+
+
+class VirtualTaskTable(TaskTable):
+    """
+    Virtual-scrolling mode: only the visible window (plus OVERSCAN rows) exists
+    as Treeview items. Those items are reused and refilled from `rows` as the
+    user scrolls, so Tk work and memory do not grow with the number of tasks.
+    The selection is kept here by task ID, since rows leave the window:
+    click selects, Ctrl-click toggles and Shift-click selects the range from
+    the last plain or Ctrl click.
+    """
+
+    def __init__(self, tree, row_values, scrollbar, row_height):
+        super().__init__(tree, row_values)
+        tree.configure(yscrollcommand="")
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.offset = 0
+        self.page = 20
+        self.slots = []
+        # Values last written to each slot, parallel to slots
+        self.slot_values = []
+        # The focused task (the one Edit opens), the selected task IDs and
+        # the task Shift-click extends from
+        self.selected = None
+        self.selection = set()
+        self.anchor = None
+
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", self._on_resize)
+        tree.bind("<Button-1>", self._on_click)
+        tree.bind("<MouseWheel>", self._on_wheel)
+        tree.bind("<Button-4>", lambda e: self.scroll(-WHEEL_STEP))
+        tree.bind("<Button-5>", lambda e: self.scroll(WHEEL_STEP))
+        tree.bind("<Up>", lambda e: self._move_selection(-1))
+        tree.bind("<Down>", lambda e: self._move_selection(1))
+        tree.bind("<Prior>", lambda e: self._move_selection(-self.page))
+        tree.bind("<Next>", lambda e: self._move_selection(self.page))
+
+    # ---------- ROWS ----------
+    def set_rows(self, rows, top=False):
+        self.rows = list(rows)
+        if top:
+            self.offset = 0
+        ids = {t["ID"] for t in self.rows}
+        # Selected rows that are no longer shown are no longer selected
+        if self.selected not in ids:
+            self.selected = None
+        if self.anchor not in ids:
+            self.anchor = None
+        if self.selection:
+            self.selection &= ids
+        self._render()
+
+    def insert(self, index, t):
+        self.rows.insert(index, t)
+        if index < self.offset + len(self.slots):
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def delete(self, index):
+        t = self.rows.pop(index)
+        if t["ID"] == self.selected:
+            self.selected = None
+        self.selection.discard(t["ID"])
+        if index < self.offset + len(self.slots):
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def selected_id(self):
+        return self.selected
+
+    def rename(self, old_id, new_id):
+        # Selection is kept by ID, so it follows the task to its new id
+        if self.selected == old_id:
+            self.selected = new_id
+        if self.anchor == old_id:
+            self.anchor = new_id
+        if old_id in self.selection:
+            self.selection.discard(old_id)
+            self.selection.add(new_id)
+
+    def selected_ids(self):
+        return [t["ID"] for t in self.rows if t["ID"] in self.selection]
+
+    def select_all(self):
+        self.selection = {t["ID"] for t in self.rows}
+        self._render()
+
+    # ---------- SCROLLING ----------
+    def yview(self, *args):
+        """
+        Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"|"pages").
+        """
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.offset += step * self.page if args[2] == "pages" else step
+        self._render()
+
+    def scroll(self, rows):
+        self.offset += rows
+        self._render()
+        return "break"
+
+    def scroll_to(self, index):
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.page:
+            self.offset = index - self.page + 1
+        self._render()
+
+    def _on_wheel(self, event):
+        return self.scroll(-WHEEL_STEP if event.delta > 0 else WHEEL_STEP)
+
+    def _on_resize(self, event):
+        # The heading takes roughly one row
+        page = max(1, event.height // self.row_height - 1)
+        if page != self.page:
+            self.page = page
+            self._render()
+
+    # ---------- SELECTION ----------
+    def _on_click(self, event):
+        # Headings and column separators keep their own handling
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        iid = self.tree.identify_row(event.y)
+        if iid not in self.slots:
+            return "break"
+        index = self.offset + self.slots.index(iid)
+        task_id = self.rows[index]["ID"]
+
+        # Event state bits: 0x1 is Shift, 0x4 is Control
+        start = self._index_of(self.anchor) if event.state & 0x1 else None
+        if start is not None:
+            lo, hi = sorted((start, index))
+            self.selection = {t["ID"] for t in self.rows[lo:hi + 1]}
+        else:
+            if event.state & 0x4:
+                self.selection ^= {task_id}
+            else:
+                self.selection = {task_id}
+            self.anchor = task_id
+        self.selected = task_id
+        self.tree.focus_set()
+        self._render()
+        return "break"
+
+    def _move_selection(self, step):
+        if not self.rows:
+            return "break"
+        index = self._index_of(self.selected)
+        index = 0 if index is None else max(0, min(len(self.rows) - 1, index + step))
+        self.selected = self.anchor = self.rows[index]["ID"]
+        self.selection = {self.selected}
+        self.scroll_to(index)
+        return "break"
+
+    def _index_of(self, task_id):
+        if task_id is None:
+            return None
+        for k in range(len(self.slots)):
+            if self.rows[self.offset + k]["ID"] == task_id:
+                return self.offset + k
+        for i, t in enumerate(self.rows):
+            if t["ID"] == task_id:
+                return i
+        return None
+
+    # ---------- RENDER ----------
+    def _render(self):
+        n = len(self.rows)
+        self.offset = max(0, min(self.offset, n - self.page))
+        needed = min(self.page + OVERSCAN, n - self.offset)
+
+        while len(self.slots) < needed:
+            self.slots.append(self.tree.insert("", "end"))
+            self.slot_values.append(None)
+        while len(self.slots) > needed:
+            self.tree.delete(self.slots.pop())
+            self.slot_values.pop()
+
+        focus_iid = None
+        selected_iids = []
+        for k, iid in enumerate(self.slots):
+            t = self.rows[self.offset + k]
+            values = self.row_values(t)
+            # Scrolling by a few rows rewrites every slot; edits elsewhere rewrite none
+            if self.slot_values[k] != values:
+                self.tree.item(iid, values=values)
+                self.slot_values[k] = values
+            if t["ID"] in self.selection:
+                selected_iids.append(iid)
+            if t["ID"] == self.selected:
+                focus_iid = iid
+
+        if selected_iids:
+            self.tree.selection_set(selected_iids)
+        else:
+            self.tree.selection_remove(*self.tree.selection())
+        if focus_iid:
+            self.tree.focus(focus_iid)
+        # Keep the Treeview itself pinned to the first slot
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+        if self.on_near_end and self.offset + self.page >= NEAR_END * n:
+            self.on_near_end()
+
+    def _update_scrollbar(self):
+        n = len(self.rows)
+        if not n:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set(self.offset / n, min(1.0, (self.offset + self.page) / n))
@@ -0,0 +1,200 @@
+"""
+Bulk import/export of tasks as CSV or JSON Lines.
+
+    python transfer.py export --user a@example.com tasks.jsonl
+    python transfer.py import --user b@example.com tasks.jsonl
+    python transfer.py export --user a@example.com --format csv - > tasks.csv
+
+Files are streamed: export reads pages through TaskDB.iter_tasks and import
+inserts each chunk with one executemany and one commit. The account is
+signed in as for cli.py: --token, --user with TASKMANAGER_PASSWORD, or the
+saved session.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from db import TaskDB
+from utils import str_to_date
+
+FIELDS = ["title", "description", "due_date", "priority", "category", "status", "recurrence",
+          "next_due"]
+FORMATS = ("csv", "jsonl")
+
+# Export column -> key of the dicts returned by TaskDB
+_TASK_KEYS = {
+    "title": "TITLE",
+    "description": "DESCRIPTION",
+    "due_date": "DUE_DATE",
+    "priority": "PRIORITY",
+    "category": "CATEGORY",
+    "status": "STATUS",
+    "recurrence": "RECURRENCE",
+    # Where a repeating task's series has got to; without it an import restarts it
+    "next_due": "NEXT_DUE",
+}
+
+
+# ================= FILES =================
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of {path!r}; pass --format")
+
+
+@contextmanager
+def _open(path, mode):
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+    else:
+        with open(path, mode, newline="", encoding="utf-8") as f:
+            yield f
+
+
+def read_tasks(f, fmt, on_error=None):
+    """
+    Yields task dicts (lowercase keys, as TaskDB.add_task expects) from an open file.
+    Empty values are dropped so TaskDB applies its defaults. A bad record
+    raises ValueError, or with on_error is passed to on_error(record number,
+    message) and skipped.
+    """
+    if fmt == "csv":
+        rows = csv.DictReader(f)
+    else:
+        rows = (line for line in f if line.strip())
+
+    for n, row in enumerate(rows, start=1):
+        try:
+            if fmt != "csv":
+                row = json.loads(row)
+                if not isinstance(row, dict):
+                    raise ValueError("expected a JSON object")
+            task = {
+                k.lower(): v for k, v in row.items()
+                if k and k.lower() in FIELDS and v not in ("", None)
+            }
+            if not task.get("title"):
+                raise ValueError("title is required")
+            # Checked now: a bad date would otherwise fail its whole chunk
+            str_to_date(task.get("due_date"))
+            str_to_date(task.get("next_due"))
+        except ValueError as e:
+            if on_error is None:
+                raise ValueError(f"Record {n}: {e}") from None
+            on_error(n, str(e))
+            continue
+        yield task
+
+
+def write_tasks(f, fmt, tasks):
+    """
+    Writes TaskDB task dicts to an open file; returns the number written.
+    """
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+
+    count = 0
+    for t in tasks:
+        record = {field: t.get(key) or "" for field, key in _TASK_KEYS.items()}
+        if writer:
+            writer.writerow(record)
+        else:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ================= COMMANDS =================
+
+def import_tasks(db, user_email, path, fmt=None, chunk_size=1000, progress=None, on_error=None):
+    """
+    Streams tasks from path into user_email's account, one transaction per chunk.
+    on_error is as for read_tasks. Returns (rows, seconds).
+    """
+    fmt = detect_format(path, fmt)
+    start = time.perf_counter()
+    rows = 0
+    with _open(path, "r") as f:
+        for chunk in chunked(read_tasks(f, fmt, on_error), chunk_size):
+            rows += db.add_tasks(chunk, user_email)
+            if progress:
+                progress(rows, time.perf_counter() - start)
+    return rows, time.perf_counter() - start
+
+
+def export_tasks(db, user_email, path, fmt=None, chunk_size=1000):
+    """
+    Streams user_email's tasks to path. Returns (rows, seconds).
+    """
+    fmt = detect_format(path, fmt)
+    start = time.perf_counter()
+    with _open(path, "w") as f:
+        rows = write_tasks(f, fmt, db.iter_tasks(user_email, chunk_size, full=True))
+    return rows, time.perf_counter() - start
+
+
+def _report(verb, rows, seconds):
+    rate = rows / seconds if seconds else 0
+    print(f"{verb} {rows} tasks in {seconds:.2f}s ({rate:,.0f} rows/s)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of tasks")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="file to read/write, or - for stdin/stdout")
+    parser.add_argument("--user", help="account email (password from TASKMANAGER_PASSWORD)")
+    parser.add_argument("--token", help="session token (default: TASKMANAGER_TOKEN)")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    # cli imports this module for FIELDS and chunked
+    from auth_db import AuthDB
+    from cli import CLIError, authenticate
+    try:
+        user_email = authenticate(args, AuthDB())
+    except CLIError as e:
+        print(f"error: {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+    db = TaskDB()
+    if args.command == "import":
+        failed = []
+
+        def skip(n, message):
+            print(f"Record {n}: {message} (skipped)", file=sys.stderr)
+            failed.append(n)
+
+        rows, seconds = import_tasks(db, user_email, args.path, args.format, args.chunk_size,
+                                     on_error=skip)
+        _report("Imported", rows, seconds)
+        if failed:
+            print(f"{len(failed)} records failed", file=sys.stderr)
+            raise SystemExit(1)
+    else:
+        rows, seconds = export_tasks(db, user_email, args.path, args.format, args.chunk_size)
+        _report("Exported", rows, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,9 @@ def date_to_str(dt):
         return ""
     return dt.strftime(DATE_FORMAT)
 
+# Sort rank stored in tasks.priority_rank (higher sorts first)
+PRIORITY_RANK = {"High": 3, "Medium": 2, "Low": 1}
+
 PRIORITY_COLORS = {
     "Low": "#8BC34A",
     "Normal": "#2196F3",
@@ -0,0 +1,108 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+
+class DBWorker:
+    """
+    Runs database calls off the Tk event thread.
+
+    Jobs execute on a small thread pool (one thread by default, so writes
+    keep their submission order). Results are queued and delivered to the
+    on_done / on_error callbacks from the Tk main loop via root.after(),
+    since Tk widgets must only be touched from that thread.
+
+    Jobs submitted with the same key supersede each other: an older job that
+    has not started is cancelled, and the result of one that is already
+    running is dropped.
+    """
+
+    def __init__(self, root, threads=None, poll_ms=None, on_busy=None):
+        self.root = root
+        self.poll_ms = config.DB_WORKER_POLL_MS if poll_ms is None else poll_ms
+        self.on_busy = on_busy
+        self.pending = 0
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads or config.DB_WORKER_THREADS,
+            thread_name_prefix="db-worker"
+        )
+        self._results = queue.Queue()
+        self._generation = {}
+        self._futures = {}
+        self._polling = None
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None):
+        generation = None
+        if key is not None:
+            generation = self._generation.get(key, 0) + 1
+            self._generation[key] = generation
+            previous = self._futures.pop(key, None)
+            if previous is not None and previous.cancel():
+                self._finished()
+
+        self._started()
+        future = self._executor.submit(
+            self._run, fn, args, on_done, on_error, key, generation
+        )
+        if key is not None:
+            self._futures[key] = future
+        return future
+
+    def shutdown(self):
+        if self._polling:
+            self.root.after_cancel(self._polling)
+            self._polling = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- WORKER THREAD ----------
+    def _run(self, fn, args, on_done, on_error, key, generation):
+        if self._superseded(key, generation):
+            self._results.put((None, None, None, None, key, generation))
+            return
+        try:
+            result, error = fn(*args), None
+        except Exception as e:
+            result, error = None, e
+        self._results.put((on_done, on_error, result, error, key, generation))
+
+    def _superseded(self, key, generation):
+        return key is not None and self._generation.get(key) != generation
+
+    # ---------- TK THREAD ----------
+    def _poll(self):
+        self._polling = None
+        while True:
+            try:
+                on_done, on_error, result, error, key, generation = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._finished()
+            if self._superseded(key, generation):
+                continue
+            if key is not None:
+                self._futures.pop(key, None)
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    self.root.report_callback_exception(
+                        type(error), error, error.__traceback__
+                    )
+            elif on_done:
+                on_done(result)
+        if self.pending:
+            self._polling = self.root.after(self.poll_ms, self._poll)
+
+    def _started(self):
+        self.pending += 1
+        if self._polling is None:
+            self._polling = self.root.after(self.poll_ms, self._poll)
+        if self.on_busy:
+            self.on_busy(self.pending)
+
+    def _finished(self):
+        self.pending -= 1
+        if self.on_busy:
+            self.on_busy(self.pending)